@@ -1,7 +1,10 @@
 # app_test.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 import joblib
 import pandas as pd
+from drift import DriftMonitor, profile_path
+from serving import AdmissionControl, LiteSwitch, stream_response, what_if
+from rank_index import IndexCache, query as rank_query
 
 app = Flask(__name__)
 
@@ -16,15 +19,31 @@ FEATURES = [
     'bowl_matches','bowl_innings','bowl_maidens','bowl_economy','bowl_strike_rate','bowl_wickets','bowl_balls_from_overs'
 ]
 
+# Live feature sketches compared against the training profile
+monitor = DriftMonitor.load(profile_path(MODEL_PATH), FEATURES)
+
+# Bounded request queue: fast 503 + Retry-After instead of unbounded waits
+admission = AdmissionControl.for_format("test")
+
+# Distilled lite model, served on ?lite=1 or when the app is overloaded/queueing
+switch = LiteSwitch.load(model, MODEL_PATH, admission)
+
+# Percentile / leaderboard index (built by rank_index.py)
+ranks = IndexCache("test")
+
 @app.route("/predict_test", methods=["POST"])
+@admission.guard
 def predict_test():
     data = request.get_json()
+    if data is not None:
+        monitor.observe(data)
     # Fill missing keys with 0
     row = {k: data.get(k, 0) for k in FEATURES}
     X = pd.DataFrame([row], columns=FEATURES)
 
     try:
-        y = model.predict(X)[0]
+        with switch.pick(request) as (active_model, is_lite):
+            y = active_model.predict(X)[0]
 
         # Round predictions
         runs_pred = int(round(y[0])) if y[0] > 1 else 0
@@ -43,11 +62,56 @@ def predict_test():
             'average': average_pred,
             'strike_rate': strike_rate_pred,
             'wickets': wickets_pred,
-            'economy': economy_pred
+            'economy': economy_pred,
+            'lite': is_lite
         }
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route("/predict_stream_test", methods=["POST"])
+def predict_stream_test():
+    # NDJSON (or CSV with a header row) in, one NDJSON prediction per row out,
+    # scored in micro-batches as the body arrives; each batch takes an admission slot
+    active_model, is_lite = switch.requested(request)
+    body = stream_response(active_model, request, FEATURES, admission)
+    return Response(stream_with_context(body), mimetype="application/x-ndjson",
+                    headers={'X-Prediction-Mode': 'lite' if is_lite else 'full'})
+
+@app.route("/whatif_test", methods=["POST"])
+@admission.guard
+def whatif_test():
+    # Base player row + grid of feature perturbations, scored in one batched predict
+    data = request.get_json() or {}
+    try:
+        with switch.pick(request) as (active_model, is_lite):
+            result = what_if(active_model, data, FEATURES)
+        result['lite'] = is_lite
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route("/rank_test", methods=["GET"])
+def rank_test():
+    # ?metric=strike_rate&value=142.5 -> percentile, ?metric=runs&top=10 -> leaderboard
+    index = ranks.get()
+    if index is None:
+        return jsonify({'error': 'rank index not built; run rank_index.py'}), 404
+    try:
+        return jsonify(rank_query(index, request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route("/drift_test", methods=["GET"])
+def drift_test():
+    return jsonify(monitor.report())
+
+@app.route("/metrics_test", methods=["GET"])
+def metrics_test():
+    # Prometheus text: queue depth, in-flight, admitted, shed, queue wait
+    return admission.metrics() + switch.metrics(admission.fmt), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 if __name__ == "__main__":
     app.run(host="127.0.0.1", port=5001, debug=False)
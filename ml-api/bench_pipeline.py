@@ -0,0 +1,329 @@
+#bench_pipeline.py
+"""
+End-to-end data pipeline benchmark on synthetic raw data.
+
+For each scale (rows in the IPL deliveries file; the other tables are sized
+from it) this script:
+1. generates raw international / IPL / performance CSVs with the expected
+   schemas, consistent with the quality.py rules apart from the dirt the
+   cleaners handle, injected at DIRTY_SHARE (blanks, "-", "183*", negatives,
+   duplicate rows);
+2. runs clean_data.main() with a StageProfiler, so every table is timed as
+   read / validate / transform / finalize / write, and records how many rows
+   each table quarantined;
+3. trains each format, either with the build scripts (merge + SimpleImputer,
+   fit, evaluate) or with --trainer lean (training.py: load, impute, fit).
+
+Each scale runs in a fresh Python process so peak RSS is not inherited from
+the previous one. The result is one JSON file with the wall time, CPU time and
+peak RSS of every stage per scale, plus the git commit, so scaling curves can
+be compared across commits.
+
+Usage:
+    python bench_pipeline.py                               # 10k, 100k, 1M rows
+    python bench_pipeline.py --scales 10000 10000000 --trainer lean --rounds 50
+    python bench_pipeline.py --skip-train --out bench/clean_only.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from profiling import StageProfiler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# -------------------------------
+# Defaults
+# -------------------------------
+SCALES = [10_000, 100_000, 1_000_000]
+FORMATS = ["odi", "t20", "test"]
+BUILD_MODULES = {"odi": "build_ODI_model", "t20": "build_T20_model", "test": "build_Test_model"}
+INTL_FILES = {"odi": "ODI", "t20": "t20", "test": "TEST"}
+
+# Table sizes relative to the deliveries rows
+PLAYERS_PER_ROW = 0.1        # rows per international table
+PERF_PER_ROW = 0.1           # rows in performance bat/ball
+BALLS_PER_MATCH = 240
+DIRTY_SHARE = 0.01           # cells replaced with blanks/"-"/negatives (a third each)
+DUPLICATE_SHARE = 0.005      # rows repeated verbatim
+
+# ---------- Synthetic Raw Data ----------
+
+def _dirty(df, cols, rng, share=DIRTY_SHARE):
+    """Blank, "-" or negate a small share of cells, and append duplicate rows.
+
+    The generators otherwise keep every quality.py invariant, so the negatives
+    (about share / 3 of the rows per dirtied column) are the only rows the
+    validate stage should quarantine.
+    """
+    n = len(df)
+    for c in cols:
+        hit = np.flatnonzero(rng.random(n) < share)
+        if not len(hit):
+            continue
+        col = df[c].astype(object)
+        kind = rng.integers(0, 3, size=len(hit))
+        col.iloc[hit[kind == 0]] = " "
+        col.iloc[hit[kind == 1]] = "-"
+        col.iloc[hit[kind == 2]] = -1
+        df[c] = col
+    dup = df.iloc[np.flatnonzero(rng.random(n) < DUPLICATE_SHARE)]
+    return pd.concat([df, dup], ignore_index=True)
+
+def _players(n, rng):
+    return np.char.add("Player ", rng.integers(0, max(n, 1) * 2, size=n).astype(str))
+
+def make_international(n, rng):
+    """(batting, bowling, all_round) raw tables with n player rows each."""
+    ids = rng.permutation(n * 2)[:n]
+    innings = rng.integers(1, 300, size=n)
+    not_out = (innings * rng.uniform(0, 0.3, size=n)).astype(int)
+    balls = (innings * rng.uniform(5, 60, size=n)).astype(int)
+    runs = (balls * rng.uniform(0.4, 1.4, size=n)).astype(int)
+    hs = np.minimum(runs, rng.integers(0, 265, size=n)).astype(str)
+    hs = np.where(rng.random(n) < 0.3, np.char.add(hs, "*"), hs)
+    batting = pd.DataFrame({
+        'id': ids, 'player': _players(n, rng), 'matches': innings + rng.integers(0, 20, size=n),
+        'innings': innings, 'not_out': not_out, 'runs': runs, 'high_score': hs,
+        'average': np.round(runs / np.maximum(innings - not_out, 1), 2), 'ball_faced': balls,
+        'strike_rate': np.round(100 * runs / np.maximum(balls, 1), 2),
+        '100s': runs // 3000, '50': runs // 800, '0s': rng.integers(0, 20, size=n),
+        '4s': runs // 12, '6s': runs // 60,
+    })
+    whole_overs = rng.integers(0, 3000, size=n)
+    overs = whole_overs + rng.integers(0, 6, size=n) / 10
+    wk = np.minimum(rng.integers(0, 400, size=n), whole_overs * 6)      # wickets <= balls
+    md = (whole_overs * rng.uniform(0, 0.1, size=n)).astype(int)        # maidens <= overs
+    bowling = pd.DataFrame({
+        'id': ids, 'player': batting['player'], 'mt': batting['matches'], 'in': innings,
+        'ov': overs, 'md': md, 'bwe': np.round(rng.uniform(3, 10, size=n), 2),
+        'bwsr': np.round(overs * 6 / np.maximum(wk, 1), 2), 'wk': wk,
+    })
+    all_round = pd.DataFrame({
+        'id': ids, 'player': batting['player'], 'country': rng.choice(["IND", "AUS", "ENG", "SA"], size=n),
+        'span': "2001-2020", 'mt': batting['matches'], 'runs': runs, 'hs': hs, 'bat_av': batting['average'],
+        '100': batting['100s'], 'wk': wk, 'bowl_av': np.round(rng.uniform(15, 60, size=n), 2),
+        '5': rng.integers(0, 10, size=n), 'ct': rng.integers(0, 150, size=n), 'st': 0,
+    })
+    return (_dirty(batting, ['runs', 'innings', 'strike_rate', 'ball_faced'], rng),
+            _dirty(bowling, ['ov'], rng),
+            _dirty(all_round, ['runs', 'wk', 'bat_av'], rng))
+
+def make_ipl(n, rng):
+    """(matches, deliveries) raw tables; deliveries has n rows."""
+    n_matches = max(n // BALLS_PER_MATCH, 1)
+    venues = np.array([f"Stadium {i}" for i in range(40)])
+    teams = np.array([f"Team {i}" for i in range(10)])
+    match_ids = np.arange(1, n_matches + 1)
+    matches = pd.DataFrame({
+        'id': match_ids, 'season': 2008 + match_ids * 17 // max(n_matches, 1),
+        'city': "City", 'date': "2020-04-01", 'venue': rng.choice(venues, size=n_matches),
+        'team1': rng.choice(teams, size=n_matches), 'team2': rng.choice(teams, size=n_matches),
+        'winner': rng.choice(teams, size=n_matches), 'result_margin': rng.integers(1, 100, size=n_matches),
+    })
+    ball = np.arange(n)
+    batsman_runs = rng.choice([0, 0, 0, 1, 1, 2, 3, 4, 6], size=n)
+    wide = rng.random(n) < 0.03
+    is_wicket = (rng.random(n) < 0.05).astype(int)
+    batter = _players(n, rng) if n < 2000 else np.char.add("Batter ", rng.integers(0, 700, size=n).astype(str))
+    deliveries = pd.DataFrame({
+        'match_id': np.minimum(ball // BALLS_PER_MATCH + 1, n_matches), 'inning': 1 + (ball // 120) % 2,
+        'batting_team': rng.choice(teams, size=n), 'bowling_team': rng.choice(teams, size=n),
+        'over': (ball // 6) % 20, 'ball': ball % 6 + 1, 'batter': batter,
+        'bowler': np.char.add("Bowler ", rng.integers(0, 500, size=n).astype(str)),
+        'non_striker': "Other", 'batsman_runs': np.where(wide, 0, batsman_runs),
+        'extra_runs': wide.astype(int), 'total_runs': np.where(wide, 1, batsman_runs),
+        'extras_type': np.where(wide, "wides", ""), 'is_wicket': is_wicket,
+        'player_dismissed': np.where(is_wicket == 1, batter, ""),
+        'dismissal_kind': np.where(is_wicket == 1, "caught", ""),
+    })
+    return matches, _dirty(deliveries, ['batsman_runs', 'total_runs'], rng)
+
+def make_performance(n, rng):
+    """(bat, ball, match) raw tables with n bat/ball rows."""
+    n_matches = max(n // 22, 1)
+    match_id = rng.integers(1, n_matches + 1, size=n)
+    balls = rng.integers(0, 150, size=n)
+    runs = (balls * rng.uniform(0, 2, size=n)).astype(int)
+    bat = pd.DataFrame({
+        'match_id': match_id, 'player': _players(n, rng), 'team': "Team", 'runs': runs, 'balls': balls,
+        '4s': runs // 10, '6s': runs // 30, 'sr': np.round(100 * runs / np.maximum(balls, 1), 2),
+        'dismissal': rng.choice(["caught", "bowled", "not out"], size=n),
+    })
+    overs = rng.integers(0, 10, size=n)
+    ball = pd.DataFrame({
+        'match_id': match_id, 'player': _players(n, rng), 'team': "Team", 'overs': overs,
+        'maidens': np.minimum(rng.integers(0, 3, size=n), overs),
+        'runs': overs * rng.integers(3, 12, size=n),
+        'wickets': np.minimum(rng.integers(0, 6, size=n), overs * 6),
+        'econ': np.round(rng.uniform(3, 12, size=n), 2),
+    })
+    match = pd.DataFrame({
+        'match_id': np.arange(1, n_matches + 1), 'date': "2020-01-01", 'venue': "Ground",
+        'team1': "Team A", 'team2': "Team B", 'winner': "Team A", 'format': rng.choice(["ODI", "T20"], size=n_matches),
+    })
+    return _dirty(bat, ['runs', 'balls'], rng), _dirty(ball, ['runs', 'wickets'], rng), match
+
+def generate_raw(base, rows, seed=42):
+    """Write a datasets/-shaped tree of raw CSVs under base. Returns rows written per file."""
+    rng = np.random.default_rng(seed)
+    sizes = {}
+
+    def write(df, *parts):
+        path = os.path.join(base, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_csv(path, index=False)
+        sizes[os.path.join(*parts)] = len(df)
+
+    n_players = max(int(rows * PLAYERS_PER_ROW), 100)
+    for fmt, prefix in INTL_FILES.items():
+        batting, bowling, all_round = make_international(n_players, rng)
+        write(batting, "international", f"{prefix}_batting.csv")
+        write(bowling, "international", f"{prefix}_bowling.csv")
+        write(all_round, "international", f"{prefix}_all_round.csv")
+    matches, deliveries = make_ipl(rows, rng)
+    write(matches, "ipl", "matches.csv")
+    write(deliveries, "ipl", "deliveries.csv")
+    bat, ball, match = make_performance(max(int(rows * PERF_PER_ROW), 100), rng)
+    write(bat, "performance", "bat.csv")
+    write(ball, "performance", "ball.csv")
+    write(match, "performance", "match.csv")
+    return sizes
+
+# ---------- Pipeline Stages ----------
+
+def train_build(fmt, data_path, prof):
+    """Build-script path: id merge + SimpleImputer, MultiOutputRegressor fit, evaluate."""
+    import importlib
+    build = importlib.import_module(BUILD_MODULES[fmt])
+    build.data_path = data_path
+    with prof.stage(f"{fmt}: merge + impute"):
+        player_df = build.load_player_df()
+    with prof.stage(f"{fmt}: fit"):
+        xgb_model, X_train, X_test, y_train, y_test = build.train_model(player_df)
+    with prof.stage(f"{fmt}: evaluate"):
+        build.evaluate_model(xgb_model, X_test, y_test)
+
+def train_lean(fmt, data_path, prof, rounds):
+    """training.py path: float32 load + merge, median impute, shared QuantileDMatrix fit."""
+    import xgboost as xgb
+    import training
+    with prof.stage(f"{fmt}: load + merge"):
+        player_df = training.load_player_df(fmt, data_path, impute=False)
+    with prof.stage(f"{fmt}: impute"):
+        training.impute_median(player_df, training.FEATURES)
+    with prof.stage(f"{fmt}: fit"):
+        train_idx, _ = training.split_indices(len(player_df))
+        X_train = player_df[training.FEATURES].to_numpy(dtype=np.float32)[train_idx]
+        y_train = player_df[training.TARGETS].to_numpy(dtype=np.float32)[train_idx]
+        dtrain = xgb.QuantileDMatrix(X_train, feature_names=training.FEATURES)
+        training.train_shared(dtrain, y_train, num_boost_round=rounds)
+
+def run_scale(rows, workdir, trainer="build", formats=FORMATS, rounds=None, skip_train=False, seed=42):
+    """Generate, clean and train at one scale in this process; returns the stage records."""
+    import clean_data
+    prof = StageProfiler()
+    base = os.path.join(workdir, f"rows_{rows}")
+    with prof.stage("generate raw"):
+        sizes = generate_raw(base, rows, seed)
+    with prof.stage("clean_data total"):
+        report = clean_data.main(base=base, prof=prof)
+    if not skip_train:
+        data_path = os.path.join(base, "cleaned")
+        for fmt in formats:
+            with prof.stage(f"{fmt}: train total"):
+                if trainer == "lean":
+                    import training
+                    train_lean(fmt, data_path, prof, rounds or training.N_ROUNDS)
+                else:
+                    train_build(fmt, data_path, prof)
+    quarantined = {r["table"]: {"rows": r["rows"], "rejected": r["rejected"]} for r in report}
+    return {"rows": rows, "files": sizes, "quarantined": quarantined, "stages": prof.stages}
+
+# ---------- Runner ----------
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark clean_data + training on synthetic raw data.")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES,
+                        help="IPL deliveries rows per run; other tables are sized from it")
+    parser.add_argument("--trainer", choices=["build", "lean"], default="build")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--rounds", type=int, help="boosting rounds (lean trainer; default training.N_ROUNDS)")
+    parser.add_argument("--skip-train", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="where synthetic data is written (default: a temp dir, removed after)")
+    parser.add_argument("--out", default="pipeline_bench.json")
+    parser.add_argument("--child", help=argparse.SUPPRESS)  # internal: run one scale, write JSON here
+    args = parser.parse_args(argv)
+
+    if args.child:
+        result = run_scale(args.scales[0], args.workdir, args.trainer, args.formats,
+                           args.rounds, args.skip_train, args.seed)
+        with open(args.child, "w") as f:
+            json.dump(result, f)
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="crickstat_bench_")
+    runs = []
+    try:
+        for rows in args.scales:
+            print(f"\n================ {rows:,} rows ================\n")
+            child_json = os.path.join(workdir, f"result_{rows}.json")
+            cmd = [sys.executable, os.path.abspath(__file__), "--scales", str(rows), "--workdir", workdir,
+                   "--trainer", args.trainer, "--formats", *args.formats, "--seed", str(args.seed),
+                   "--child", child_json]
+            if args.rounds:
+                cmd += ["--rounds", str(args.rounds)]
+            if args.skip_train:
+                cmd.append("--skip-train")
+            t0 = time.perf_counter()
+            subprocess.run(cmd, cwd=HERE, check=True)
+            with open(child_json) as f:
+                run = json.load(f)
+            run["process_wall_s"] = round(time.perf_counter() - t0, 3)
+            runs.append(run)
+            shutil.rmtree(os.path.join(workdir, f"rows_{rows}"), ignore_errors=True)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    payload = {
+        "commit": _git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "trainer": None if args.skip_train else args.trainer,
+        "runs": runs,
+    }
+    out_dir = os.path.dirname(os.path.abspath(args.out))
+    os.makedirs(out_dir, exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(payload, f, indent=2)
+
+    summary = pd.DataFrame([{"rows": r["rows"], **{k: s[k] for k in ("stage", "wall_s", "cpu_s", "peak_rss_mb")}}
+                            for r in runs for s in r["stages"]])
+    print("\n================ Pipeline Benchmark ================\n")
+    print(summary.to_string(index=False))
+    print(f"\nSaved {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,21 @@ Handles:
 - International (ODI, T20, TEST) batting/bowling/allround
 - IPL matches & deliveries
 - Performance data (bat, ball, match)
+Rows failing the quality.py rules are moved to datasets/cleaned/quarantine/
+with reason codes before cleaning.
 """
 
+import json
 import os
+from contextlib import nullcontext
 import pandas as pd
 import numpy as np
 
+import quality
+
+# Share of non-null values that must parse as numbers for clean_generic to convert a column
+NUMERIC_SHARE = 0.95
+
 # ---------- Utility Functions ----------
 
 def to_numeric(s, allow_negative=False):
@@ -55,11 +64,9 @@ def finalize_clean(df):
     df = df.drop_duplicates()
     return df
 
-# ---------- Cleaning Functions ----------
-
-def clean_batting(path, out_path):
-    df = pd.read_csv(path)
+# ---------- Table Transforms (DataFrame in, DataFrame out) ----------
 
+def transform_batting(df):
     # Clean high_score column
     if "high_score" in df.columns or "hs" in df.columns:
         hs_col = "high_score" if "high_score" in df.columns else "hs"
@@ -72,13 +79,9 @@ def clean_batting(path, out_path):
         if c in df.columns:
             df[c] = to_numeric(df[c])
 
-    df = drop_impossible_negatives(df, df.columns)
-    df = finalize_clean(df)
-    df.to_csv(out_path, index=False)
-
-def clean_bowling(path, out_path):
-    df = pd.read_csv(path)
+    return drop_impossible_negatives(df, df.columns)
 
+def transform_bowling(df):
     # Convert overs → balls
     if "ov" in df.columns:
         df["balls_from_overs"] = df["ov"].apply(overs_to_balls)
@@ -86,13 +89,9 @@ def clean_bowling(path, out_path):
         df["balls"] = to_numeric(df["balls"])
         df["balls"] = df["balls"].fillna(df.get("balls_from_overs"))
 
-    df = drop_impossible_negatives(df, df.columns)
-    df = finalize_clean(df)
-    df.to_csv(out_path, index=False)
-
-def clean_allround(path, out_path):
-    df = pd.read_csv(path)
+    return drop_impossible_negatives(df, df.columns)
 
+def transform_allround(df):
     # Coerce numeric except player info
     for c in df.columns:
         if c.lower() not in ["player", "name", "country", "span"]:
@@ -101,74 +100,104 @@ def clean_allround(path, out_path):
             else:
                 df[c] = to_numeric(df[c], allow_negative=False)
 
-    df = drop_impossible_negatives(df, df.columns)
-    df = finalize_clean(df)
-    df.to_csv(out_path, index=False)
+    return drop_impossible_negatives(df, df.columns)
 
-def clean_generic(path, out_path):
-    """Generic cleaner for IPL & performance data."""
-    df = pd.read_csv(path, low_memory=False)
+def transform_generic(df):
+    """Generic transform for IPL & performance data."""
     for c in df.columns:
-        try:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-        except Exception:
-            pass
-    df = finalize_clean(df)
-    df.to_csv(out_path, index=False)
+        # Only convert mostly-numeric columns; names, teams and venues stay text
+        val = pd.to_numeric(df[c], errors="coerce")
+        if val.notna().sum() >= NUMERIC_SHARE * df[c].notna().sum():
+            df[c] = val
+    return df
+
+# ---------- Cleaning Functions ----------
+
+def clean_file(transform, path, out_path, prof=None, name=None):
+    """Read -> validate (quarantine bad rows) -> transform -> finalize_clean -> write.
+
+    With a profiling.StageProfiler each step is recorded as "<name>: <step>".
+    Returns the data-quality stats for the table.
+    """
+    name = name or os.path.basename(path)
+    stage = prof.stage if prof is not None else (lambda _: nullcontext())
+    with stage(f"{name}: read"):
+        df = pd.read_csv(path, low_memory=False)
+    with stage(f"{name}: validate"):
+        quarantine_dir = os.path.join(os.path.dirname(out_path) or ".", quality.QUARANTINE_DIR)
+        df, stats = quality.validate(df, name, quarantine_dir)
+    with stage(f"{name}: transform"):
+        df = transform(df)
+    with stage(f"{name}: finalize"):
+        df = finalize_clean(df)
+    with stage(f"{name}: write"):
+        df.to_csv(out_path, index=False)
+    return stats
+
+def clean_batting(path, out_path, prof=None, name=None):
+    return clean_file(transform_batting, path, out_path, prof, name)
+
+def clean_bowling(path, out_path, prof=None, name=None):
+    return clean_file(transform_bowling, path, out_path, prof, name)
+
+def clean_allround(path, out_path, prof=None, name=None):
+    return clean_file(transform_allround, path, out_path, prof, name)
+
+def clean_generic(path, out_path, prof=None, name=None):
+    """Generic cleaner for IPL & performance data."""
+    return clean_file(transform_generic, path, out_path, prof, name)
+
+# Raw tables: (cleaned key, raw sub-folder, raw file name, cleaner)
+RAW_TABLES = [
+    # International
+    ("odi_batting", "international", "ODI_batting.csv", clean_batting),
+    ("odi_bowling", "international", "ODI_bowling.csv", clean_bowling),
+    ("odi_allround", "international", "ODI_all_round.csv", clean_allround),
+    ("t20_batting", "international", "t20_batting.csv", clean_batting),
+    ("t20_bowling", "international", "t20_bowling.csv", clean_bowling),
+    ("t20_allround", "international", "t20_all_round.csv", clean_allround),
+    ("test_batting", "international", "TEST_batting.csv", clean_batting),
+    ("test_bowling", "international", "TEST_bowling.csv", clean_bowling),
+    ("test_allround", "international", "TEST_all_round.csv", clean_allround),
+    # IPL
+    ("ipl_matches", "ipl", "matches.csv", clean_generic),
+    ("ipl_deliveries", "ipl", "deliveries.csv", clean_generic),
+    # Performance
+    ("perf_bat", "performance", "bat.csv", clean_generic),
+    ("perf_ball", "performance", "ball.csv", clean_generic),
+    ("perf_match", "performance", "match.csv", clean_generic),
+]
+
+def clean_table(key, raw_path, out_dir, prof=None):
+    """Clean one raw table into <out_dir>/<key>_cleaned.csv; returns its data-quality stats."""
+    cleaner = {k: func for k, _, _, func in RAW_TABLES}[key]
+    out_path = os.path.join(out_dir, f"{key}_cleaned.csv")
+    stats = cleaner(raw_path, out_path, prof, key)
+    return dict(stats, output=out_path)
 
 # ---------- Main Runner ----------
 
-def main():
+def main(base=None, prof=None):
+    """Clean <base>/{international,ipl,performance} into <base>/cleaned (base defaults to datasets/)."""
     # Project root → CricStat/
     ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    BASE = os.path.join(ROOT, "datasets")
-
-    RAW_INTL = os.path.join(BASE, "international")
-    RAW_IPL = os.path.join(BASE, "ipl")
-    RAW_PERF = os.path.join(BASE, "performance")
+    BASE = base or os.path.join(ROOT, "datasets")
     OUT = os.path.join(BASE, "cleaned")
     os.makedirs(OUT, exist_ok=True)
 
-    # International
-    intl_files = {
-        "odi_batting": ("ODI_batting.csv", clean_batting),
-        "odi_bowling": ("ODI_bowling.csv", clean_bowling),
-        "odi_allround": ("ODI_all_round.csv", clean_allround),
-        "t20_batting": ("t20_batting.csv", clean_batting),
-        "t20_bowling": ("t20_bowling.csv", clean_bowling),
-        "t20_allround": ("t20_all_round.csv", clean_allround),
-        "test_batting": ("TEST_batting.csv", clean_batting),
-        "test_bowling": ("TEST_bowling.csv", clean_bowling),
-        "test_allround": ("TEST_all_round.csv", clean_allround),
-    }
-    for key, (fname, func) in intl_files.items():
-        fpath = os.path.join(RAW_INTL, fname)
-        if os.path.exists(fpath):
-            func(fpath, os.path.join(OUT, f"{key}_cleaned.csv"))
-            print(f"[OK] Cleaned {fname}")
-
-    # IPL
-    ipl_files = {
-        "ipl_matches": "matches.csv",
-        "ipl_deliveries": "deliveries.csv"
-    }
-    for key, fname in ipl_files.items():
-        fpath = os.path.join(RAW_IPL, fname)
+    report = []
+    for key, folder, fname, _ in RAW_TABLES:
+        fpath = os.path.join(BASE, folder, fname)
         if os.path.exists(fpath):
-            clean_generic(fpath, os.path.join(OUT, f"{key}_cleaned.csv"))
+            report.append(clean_table(key, fpath, OUT, prof))
             print(f"[OK] Cleaned {fname}")
 
-    # Performance
-    perf_files = {
-        "perf_bat": "bat.csv",
-        "perf_ball": "ball.csv",
-        "perf_match": "match.csv"
-    }
-    for key, fname in perf_files.items():
-        fpath = os.path.join(RAW_PERF, fname)
-        if os.path.exists(fpath):
-            clean_generic(fpath, os.path.join(OUT, f"{key}_cleaned.csv"))
-            print(f"[OK] Cleaned {fname}")
+    # Per-table reject counts and validation throughput
+    with open(os.path.join(OUT, "quality_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    rejected = sum(r["rejected"] for r in report)
+    print(f"[DQ] {rejected} rows quarantined in total (see {os.path.join(OUT, quality.QUARANTINE_DIR)})")
+    return report
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,258 @@
+#cli.py
+"""
+Single entry point for the ml-api tooling.
+
+    python cli.py clean                           # also refreshes existing rank indexes
+    python cli.py index --format t20              # percentile/leaderboard index
+    python cli.py cube update                     # IPL aggregate cube (ipl_cube.py options pass through)
+    python cli.py train --format t20              # build_T20_model.py
+    python cli.py train --format odi --plots      # with the matplotlib/SHAP plots
+    python cli.py train --format odi --lean --cv 5   # training.py (extra options pass through)
+    python cli.py distill --format odi --kind linear  # distill.py (options pass through)
+    python cli.py pipeline --config jobs.json --backend dask   # many leagues, local or distributed
+    python cli.py evaluate --format odi [--sample]
+    python cli.py serve --format t20
+    python cli.py bench startup
+    python cli.py bench models --format odi       # per-target vs multi-output boosters
+    python cli.py bench pipeline --scales 10000 1000000   # clean + train stages (bench_pipeline.py options)
+
+Only the standard library is imported at module load. pandas, XGBoost, Flask and
+the plotting libraries are imported inside the subcommands that need them, so
+`--help` and `serve` start fast. All paths are relative to the ml-api/ folder.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+FORMATS = ["odi", "t20", "test"]
+BUILD_MODULES = {"odi": "build_ODI_model", "t20": "build_T20_model", "test": "build_Test_model"}
+SAMPLE_MODULES = {"odi": "test_odi_model", "t20": "test_T20_model", "test": "test_Test_model"}
+APP_MODULES = {"odi": ("app", 5000), "t20": ("app_T20", 5002), "test": ("app_Test", 5001)}
+
+# -------------------------------
+# Cold-start budgets (median seconds, checked by `bench startup`)
+# -------------------------------
+HELP_BUDGET_S = 0.5
+SERVE_BUDGET_S = 4.0
+HEAVY_MODULES = ["pandas", "numpy", "sklearn", "xgboost", "flask", "matplotlib", "seaborn", "shap"]
+PLOT_MODULES = ["matplotlib", "seaborn", "shap"]
+
+# ---------- Subcommands ----------
+
+def cmd_clean(args, extra):
+    import clean_data
+    clean_data.main()
+    # Keep existing percentile/leaderboard indexes in step with the newly cleaned rows
+    import rank_index
+    for fmt in FORMATS:
+        if os.path.exists(rank_index.index_path(fmt)):
+            rank_index.refresh(fmt)
+    # ...and fold newly cleaned IPL seasons into an existing aggregate cube
+    import ipl_cube
+    if os.path.exists(ipl_cube.CUBE_PATH):
+        ipl_cube.main(["update"])
+
+def cmd_cube(args, extra):
+    import ipl_cube
+    ipl_cube.main(extra)
+
+def cmd_index(args, extra):
+    import rank_index
+    for fmt in _formats(args.format):
+        rank_index.refresh(fmt, args.data_path, rebuild=args.rebuild)
+
+def cmd_train(args, extra):
+    for fmt in _formats(args.format):
+        if args.lean:
+            import training
+            training.main(["--format", fmt] + (["--no-save"] if args.no_save else []) + extra)
+            continue
+        if extra:
+            sys.exit(f"unrecognized arguments: {' '.join(extra)} (pass-through options need --lean)")
+        build = importlib.import_module(BUILD_MODULES[fmt])
+        if fmt == "odi":
+            build.main(save=not args.no_save, show_plots=args.plots)
+        else:
+            build.main(save=not args.no_save)
+
+def cmd_distill(args, extra):
+    import distill
+    for fmt in _formats(args.format):
+        distill.main(["--format", fmt] + extra)
+
+def cmd_pipeline(args, extra):
+    import pipeline
+    pipeline.main(extra)
+
+def cmd_evaluate(args, extra):
+    for fmt in _formats(args.format):
+        if args.sample:
+            importlib.import_module(SAMPLE_MODULES[fmt]).main()
+            continue
+        import joblib
+        import numpy as np
+        import training
+        model_file = training.model_file_for(fmt, args.model)
+        model = joblib.load(model_file)
+        player_df = training.load_player_df(fmt, args.data_path or training.DATA_PATH)
+        _, test_idx = training.split_indices(len(player_df))
+        X_test = player_df.iloc[test_idx]
+        y_test = X_test[training.TARGETS].to_numpy(dtype=np.float32)
+        metrics_df = training.metrics_table(y_test, model.predict(X_test))
+        print(f"\n================ {fmt.upper()} Held-out Metrics ({model_file}) ================\n")
+        print(metrics_df.to_string(index=False))
+
+def cmd_serve(args, extra):
+    module_name, default_port = APP_MODULES[args.format]
+    app_module = importlib.import_module(module_name)
+    if args.check:
+        # Used by `bench startup`: report what got imported, then exit without serving
+        print(json.dumps({"loaded": [m for m in HEAVY_MODULES if m in sys.modules]}))
+        return
+    app_module.app.run(host=args.host, port=args.port or default_port, debug=False)
+
+def cmd_bench(args, extra):
+    if extra and args.suite != "pipeline":
+        sys.exit(f"unrecognized arguments: {' '.join(extra)}")
+    if args.suite == "pipeline":
+        import bench_pipeline
+        bench_pipeline.main(extra)
+        return
+    if args.suite == "startup":
+        sys.exit(bench_startup(args.runs))
+    if args.suite == "models":
+        import training
+        for fmt in _formats(args.format):
+            summary_df, accuracy_df = training.benchmark_models(fmt, args.data_path or training.DATA_PATH)
+            print(f"\n================ {fmt.upper()} Model Benchmark ================\n")
+            print(summary_df.to_string(index=False))
+            print()
+            print(accuracy_df.to_string(index=False))
+
+# ---------- Startup Benchmark ----------
+
+def _time_command(cmd, runs):
+    times, result = [], None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = subprocess.run(cmd, cwd=HERE, capture_output=True, text=True)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), result
+
+def _imported_top_level(importtime_stderr):
+    """Top-level package names from `python -X importtime` output."""
+    names = set()
+    for line in importtime_stderr.splitlines():
+        m = re.match(r"import time:\s+\d+\s+\|\s+\d+\s+\|\s+(\S.*)$", line)
+        if m:
+            names.add(m.group(1).strip().split(".")[0])
+    return names
+
+def bench_startup(runs=5):
+    """Measure cold start of `--help` and `serve --check`; return 1 if over budget."""
+    cli = os.path.join(HERE, "cli.py")
+    failed = False
+
+    help_s, _ = _time_command([sys.executable, cli, "--help"], runs)
+    trace = subprocess.run([sys.executable, "-X", "importtime", cli, "--help"],
+                           cwd=HERE, capture_output=True, text=True)
+    heavy = sorted(_imported_top_level(trace.stderr) & set(HEAVY_MODULES))
+    ok = help_s <= HELP_BUDGET_S and not heavy
+    failed |= not ok
+    print(f"--help          : {help_s:.3f}s (budget {HELP_BUDGET_S}s) "
+          f"heavy imports: {heavy or 'none'} {'OK' if ok else 'OVER BUDGET'}")
+
+    for fmt in FORMATS:
+        serve_s, result = _time_command([sys.executable, cli, "serve", "--format", fmt, "--check"], runs)
+        if result.returncode != 0:
+            print(f"serve {fmt:<9} : skipped ({result.stderr.strip().splitlines()[-1:] or 'failed'})")
+            continue
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])["loaded"]
+        plots = [m for m in PLOT_MODULES if m in loaded]
+        ok = serve_s <= SERVE_BUDGET_S and not plots
+        failed |= not ok
+        print(f"serve {fmt:<9} : {serve_s:.3f}s (budget {SERVE_BUDGET_S}s) "
+              f"plot imports: {plots or 'none'} {'OK' if ok else 'OVER BUDGET'}")
+    return 1 if failed else 0
+
+# ---------- Parser ----------
+
+def _formats(fmt):
+    return FORMATS if fmt == "all" else [fmt]
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="CrickStat ml-api tooling.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("clean", help="clean raw datasets into datasets/cleaned/")
+    p.set_defaults(func=cmd_clean)
+
+    p = sub.add_parser("index", help="build/refresh the percentile & leaderboard index")
+    p.add_argument("--format", choices=FORMATS + ["all"], default="all")
+    p.add_argument("--data-path")
+    p.add_argument("--rebuild", action="store_true")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser("cube", help="build/update/query the IPL aggregate cube (ipl_cube.py options pass through)")
+    p.set_defaults(func=cmd_cube, passthrough=True)
+
+    p = sub.add_parser("train", help="train the all-rounder model(s)")
+    p.add_argument("--format", choices=FORMATS + ["all"], default="all")
+    p.add_argument("--plots", action="store_true", help="show evaluation/SHAP plots (ODI)")
+    p.add_argument("--no-save", action="store_true")
+    p.add_argument("--lean", action="store_true",
+                   help="use training.py; unknown options are passed through to it")
+    p.set_defaults(func=cmd_train, passthrough=True)
+
+    p = sub.add_parser("distill", help="distil a trained model into a lite predictor (distill.py options pass through)")
+    p.add_argument("--format", choices=FORMATS + ["all"], default="all")
+    p.set_defaults(func=cmd_distill, passthrough=True)
+
+    p = sub.add_parser("pipeline", help="clean + retrain many leagues on a local or Dask backend (pipeline.py options pass through)")
+    p.set_defaults(func=cmd_pipeline, passthrough=True)
+
+    p = sub.add_parser("evaluate", help="evaluate a saved model on the held-out split")
+    p.add_argument("--format", choices=FORMATS + ["all"], default="all")
+    p.add_argument("--model", help="model file (default models/<format>_allround_xgb_model.pkl)")
+    p.add_argument("--data-path")
+    p.add_argument("--sample", action="store_true", help="predict the test_*_model.py sample player")
+    p.set_defaults(func=cmd_evaluate)
+
+    p = sub.add_parser("serve", help="run a format's prediction API")
+    p.add_argument("--format", choices=FORMATS, default="odi")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int)
+    p.add_argument("--check", action="store_true", help="load the app and exit (startup check)")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("bench", help="benchmarks")
+    p.add_argument("suite", choices=["startup", "models", "pipeline"],
+                   help="pipeline: bench_pipeline.py options pass through")
+    p.add_argument("--runs", type=int, default=5, help="startup: timed runs per command")
+    p.add_argument("--format", choices=FORMATS + ["all"], default="odi", help="models: format(s)")
+    p.add_argument("--data-path")
+    p.set_defaults(func=cmd_bench, passthrough=True)
+
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and not getattr(args, "passthrough", False):
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    os.chdir(HERE)
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    args.func(args, extra)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#distill.py
+"""
+Distil a format's trained all-rounder model into a small "lite" predictor
+for latency-sensitive requests (quick estimates, overload fallback).
+
+Student kinds:
+- trees    : few shallow boosters fitted to the teacher's predictions
+             (--multi-output: one vector-leaf booster for all targets)
+- truncate : the teacher's own first N trees per target (pruned ensemble)
+- linear   : least-squares linear surrogate over the 19 features (no XGBoost at predict time)
+
+The lite model is saved as models/<format>_allround_lite.pkl and its accuracy
+loss against the teacher is reported on the same held-out split.
+
+Usage:
+    python distill.py --format odi --kind trees --trees 40 --depth 3
+"""
+
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from ensemble import BoosterEnsemble, LinearSurrogate, MultiOutputBooster
+from serving import lite_path
+from training import (DATA_PATH, FEATURES, FORMATS, N_ROUNDS, TARGETS, XGB_PARAMS,
+                      as_booster_ensemble, load_player_df, metrics_table, model_file_for,
+                      split_indices, train_shared)
+
+# -------------------------------
+# Defaults
+# -------------------------------
+AUGMENT_FACTOR = 2     # jittered copies of the training rows labelled by the teacher
+JITTER = 0.1           # +/- relative noise on augmented rows
+
+# ---------- Students ----------
+
+def soft_labels(teacher, X):
+    """Teacher predictions used as the student's training targets."""
+    return teacher.predict(pd.DataFrame(X, columns=FEATURES)).astype(np.float32)
+
+def augment(X, factor=AUGMENT_FACTOR, jitter=JITTER, seed=42):
+    """Training rows plus jittered copies, so the student sees the teacher off the data points."""
+    rng = np.random.default_rng(seed)
+    copies = [X] + [X * rng.uniform(1 - jitter, 1 + jitter, size=X.shape).astype(np.float32)
+                    for _ in range(factor)]
+    return np.vstack(copies)
+
+def distil_trees(teacher, X_train, n_trees, depth, multi_output=False):
+    X_aug = augment(X_train)
+    y_soft = soft_labels(teacher, X_aug)
+    dtrain = xgb.QuantileDMatrix(X_aug, feature_names=FEATURES)
+    params = dict(XGB_PARAMS, max_depth=depth, learning_rate=min(1.0, 0.1 * N_ROUNDS / n_trees))
+    return train_shared(dtrain, y_soft, params, num_boost_round=n_trees, multi_output=multi_output)
+
+def truncate(teacher, n_trees):
+    teacher = as_booster_ensemble(teacher)
+    if isinstance(teacher, MultiOutputBooster):
+        return MultiOutputBooster(teacher.booster[:n_trees], TARGETS, FEATURES,
+                                  teacher.target_mean, teacher.target_std)
+    return BoosterEnsemble([b[:n_trees] for b in teacher.boosters], TARGETS, FEATURES)
+
+def distil_linear(teacher, X_train):
+    X_aug = augment(X_train)
+    y_soft = soft_labels(teacher, X_aug).astype(np.float64)
+    X_aug = X_aug.astype(np.float64)
+    A = np.hstack([X_aug, np.ones((len(X_aug), 1))])
+    coef, *_ = np.linalg.lstsq(A, y_soft, rcond=None)
+    return LinearSurrogate(coef[:-1], coef[-1], TARGETS, FEATURES)
+
+# ---------- Report ----------
+
+def single_row_latency_ms(model, row, calls=200):
+    times = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        model.predict(row)
+        times.append(time.perf_counter() - t0)
+    return round(float(np.median(times)) * 1e3, 3)
+
+def accuracy_loss(teacher_df, lite_df):
+    """Lite minus teacher, per target, in the metrics table layout."""
+    loss = lite_df.copy()
+    cols = [c for c in lite_df.columns if c != "Target"]
+    loss[cols] = (lite_df[cols] - teacher_df[cols]).round(4)
+    return loss
+
+# ---------- Main Runner ----------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distil an all-rounder model into a lite predictor.")
+    parser.add_argument("--format", choices=FORMATS, default="odi")
+    parser.add_argument("--data-path", default=DATA_PATH)
+    parser.add_argument("--model", help="teacher model (default models/<format>_allround_xgb_model.pkl)")
+    parser.add_argument("--kind", choices=["trees", "truncate", "linear"], default="trees")
+    parser.add_argument("--trees", type=int, default=40, help="trees per target (trees/truncate)")
+    parser.add_argument("--depth", type=int, default=3, help="max depth of distilled trees")
+    parser.add_argument("--multi-output", action="store_true",
+                        help="distil into one vector-leaf booster (one predict call instead of four)")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    teacher_file = model_file_for(args.format, args.model)
+    teacher = joblib.load(teacher_file)
+
+    player_df = load_player_df(args.format, args.data_path)
+    train_idx, test_idx = split_indices(len(player_df))
+    X = player_df[FEATURES].to_numpy(dtype=np.float32)
+    y = player_df[TARGETS].to_numpy(dtype=np.float32)
+    X_train, X_test, y_test = X[train_idx], X[test_idx], y[test_idx]
+    del player_df
+
+    if args.kind == "trees":
+        lite = distil_trees(teacher, X_train, args.trees, args.depth, args.multi_output)
+    elif args.kind == "truncate":
+        lite = truncate(teacher, args.trees)
+    else:
+        lite = distil_linear(teacher, X_train)
+    print(f"Lite model ({args.kind}) built.")
+
+    teacher_df = metrics_table(y_test, soft_labels(teacher, X_test))
+    lite_df = metrics_table(y_test, soft_labels(lite, X_test))
+    loss_df = accuracy_loss(teacher_df, lite_df)
+    row = pd.DataFrame(X_test[:1], columns=FEATURES)
+    latency = {"teacher_ms": single_row_latency_ms(teacher, row),
+               "lite_ms": single_row_latency_ms(lite, row)}
+
+    print("\n================ Teacher Metrics ================\n")
+    print(teacher_df.to_string(index=False))
+    print("\n================ Lite Metrics ================\n")
+    print(lite_df.to_string(index=False))
+    print("\n================ Accuracy Loss (lite - teacher) ================\n")
+    print(loss_df.to_string(index=False))
+    print(f"\nSingle-row predict p50: teacher {latency['teacher_ms']} ms, lite {latency['lite_ms']} ms")
+
+    if not args.no_save:
+        out = lite_path(teacher_file)
+        if os.path.abspath(out) == os.path.abspath(teacher_file):
+            raise SystemExit(f"refusing to overwrite the teacher model {teacher_file} with the lite model")
+        joblib.dump(lite, out)
+        with open(os.path.splitext(out)[0] + "_meta.json", "w") as f:
+            json.dump({"format": args.format, "kind": args.kind, "teacher": teacher_file,
+                       "trees": args.trees, "depth": args.depth, "multi_output": args.multi_output, "latency": latency,
+                       "teacher_metrics": teacher_df.to_dict("records"),
+                       "lite_metrics": lite_df.to_dict("records")}, f, indent=2)
+        print(f"Lite model saved at: {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#drift.py
+"""
+Feature drift monitoring for the prediction apps.
+- build/save a training-time feature profile (quantile bin edges, ranges)
+- stream live /predict payloads into per-feature sketches off the request path
+- compare the two as a drift report (PSI, missing/defaulted keys, out-of-range)
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+N_BINS = 20           # training quantile bins per feature (5% each)
+PSI_ALERT = 0.2       # population stability index above this = drifted
+MISSING_ALERT = 0.05  # share of requests that defaulted a feature to 0
+MIN_ALERT_SAMPLES = 100  # observations a feature needs before it can raise an alert
+MAX_UNKNOWN_KEYS = 100   # distinct unknown payload keys tracked; the rest are counted together
+
+# ---------- Training Profile ----------
+
+def profile_path(model_path):
+    """Profile file that sits next to a model file."""
+    return os.path.splitext(model_path)[0] + "_profile.json"
+
+def build_profile(X, n_bins=N_BINS):
+    """Per-feature quantile edges and summary stats of the training frame X."""
+    profile = {"n_rows": int(len(X)), "features": {}}
+    qs = np.linspace(0, 1, n_bins + 1)[1:-1]
+    for c in X.columns:
+        col = np.asarray(X[c], dtype=np.float64)
+        col = col[~np.isnan(col)]
+        if col.size == 0:
+            continue
+        edges = np.unique(np.quantile(col, qs))
+        counts = np.bincount(np.searchsorted(edges, col, side="right"), minlength=len(edges) + 1)
+        profile["features"][c] = {
+            "edges": edges.tolist(),
+            "expected": (counts / counts.sum()).tolist(),
+            "min": float(col.min()),
+            "max": float(col.max()),
+            "mean": float(col.mean()),
+            "p50": float(np.median(col)),
+        }
+    return profile
+
+def save_profile(X, path, n_bins=N_BINS):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(build_profile(X, n_bins), f)
+    print(f"Feature profile saved at: {path}")
+
+# ---------- Live Monitor ----------
+
+def _psi(expected, observed):
+    """Population stability index between two bin-share vectors."""
+    e = np.clip(np.asarray(expected), 1e-6, None)
+    o = np.clip(np.asarray(observed), 1e-6, None)
+    return float(np.sum((o - e) * np.log(o / e)))
+
+class DriftMonitor:
+    """Streaming per-feature sketches of prediction payloads.
+
+    observe() only enqueues the payload; a daemon thread folds it into fixed-size
+    histograms over the training quantile edges (O(1) per feature), so the
+    request path never waits on the sketch update. Each histogram has an extra
+    bin below the training min and one above the training max, and the live
+    min/max are tracked, so shifted traffic is not folded into the edge bins.
+    """
+
+    def __init__(self, features, profile=None, max_queue=10000):
+        self.features = list(features)
+        self.profile = profile
+        self._feature_set = set(self.features)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._edges, self._counts = {}, {}
+        for f in self.features:
+            spec = (profile or {}).get("features", {}).get(f)
+            self._edges[f] = np.asarray(spec["edges"]) if spec else None
+            # [below training min, training bins..., above training max]
+            self._counts[f] = np.zeros(len(spec["edges"]) + 3, dtype=np.int64) if spec else None
+        self.live_min = dict.fromkeys(self.features)
+        self.live_max = dict.fromkeys(self.features)
+        self.requests = 0
+        self.dropped = 0
+        self.started_at = time.time()
+        self.defaulted = dict.fromkeys(self.features, 0)
+        self.invalid = dict.fromkeys(self.features, 0)
+        self.below_range = dict.fromkeys(self.features, 0)
+        self.above_range = dict.fromkeys(self.features, 0)
+        self.unknown_keys = {}
+        self.unknown_other = 0
+        self.errors = 0
+        self.last_error = None
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    @classmethod
+    def load(cls, path, features):
+        """Monitor against the profile at path (key/missing counters only if it's absent)."""
+        profile = None
+        if os.path.exists(path):
+            with open(path) as f:
+                profile = json.load(f)
+        else:
+            print(f"No feature profile at {path}; drift report limited to key counters.")
+        return cls(features, profile)
+
+    def observe(self, payload):
+        """Queue one request payload (dicts only); never blocks the caller."""
+        if not isinstance(payload, dict):
+            return
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            self.dropped += 1
+
+    def _worker(self):
+        while True:
+            payload = self._queue.get()
+            try:
+                self._update(payload)
+            except Exception as e:
+                # A bad payload must not kill the sketch thread, but it should be visible
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = repr(e)
+                print(f"[DRIFT] Sketch update failed: {e!r}")
+
+    def _update(self, payload):
+        specs = (self.profile or {}).get("features", {})
+        with self._lock:
+            self.requests += 1
+            for k in payload:
+                if k in self._feature_set:
+                    continue
+                if k in self.unknown_keys or len(self.unknown_keys) < MAX_UNKNOWN_KEYS:
+                    self.unknown_keys[k] = self.unknown_keys.get(k, 0) + 1
+                else:
+                    self.unknown_other += 1
+            for f in self.features:
+                if f not in payload or payload[f] is None:
+                    self.defaulted[f] += 1
+                    continue
+                try:
+                    v = float(payload[f])
+                except (TypeError, ValueError):
+                    self.invalid[f] += 1
+                    continue
+                if np.isnan(v):
+                    self.invalid[f] += 1
+                    continue
+                spec = specs.get(f)
+                if spec is None:
+                    continue
+                if self.live_min[f] is None or v < self.live_min[f]:
+                    self.live_min[f] = v
+                if self.live_max[f] is None or v > self.live_max[f]:
+                    self.live_max[f] = v
+                if v < spec["min"]:
+                    self.below_range[f] += 1
+                    self._counts[f][0] += 1
+                elif v > spec["max"]:
+                    self.above_range[f] += 1
+                    self._counts[f][-1] += 1
+                else:
+                    self._counts[f][1 + np.searchsorted(self._edges[f], v, side="right")] += 1
+
+    def _approx_quantile(self, f, q):
+        """(quantile of live values, whether it fell outside the training range).
+
+        Interpolated inside the bin holding q; the out-of-range bins span from
+        the live min up to the training min and from the training max up to
+        the live max.
+        """
+        counts, edges = self._counts[f], self._edges[f]
+        total = counts.sum()
+        if total == 0:
+            return None, False
+        spec = self.profile["features"][f]
+        lo = min(spec["min"], self.live_min[f])
+        hi = max(spec["max"], self.live_max[f])
+        bounds = np.concatenate([[lo, spec["min"]], edges, [spec["max"], hi]])
+        cum = np.cumsum(counts) / total
+        i = min(int(np.searchsorted(cum, q)), len(counts) - 1)
+        lo_cum = cum[i - 1] if i > 0 else 0.0
+        frac = (q - lo_cum) / max(cum[i] - lo_cum, 1e-12)
+        value = float(bounds[i] + frac * (bounds[i + 1] - bounds[i]))
+        return value, i in (0, len(counts) - 1)
+
+    def report(self):
+        """Drift report: per-feature PSI, live quantiles, missing and out-of-range counts.
+
+        Alerts are only raised once a feature has MIN_ALERT_SAMPLES observations.
+        """
+        with self._lock:
+            n = self.requests
+            features = {}
+            for f in self.features:
+                entry = {
+                    "defaulted": self.defaulted[f],
+                    "defaulted_rate": round(self.defaulted[f] / n, 4) if n else 0.0,
+                    "invalid": self.invalid[f],
+                    "below_training_min": self.below_range[f],
+                    "above_training_max": self.above_range[f],
+                }
+                alerts = []
+                if n >= MIN_ALERT_SAMPLES and entry["defaulted_rate"] > MISSING_ALERT:
+                    alerts.append("defaulted")
+                counts = self._counts[f]
+                observed_n = int(counts.sum()) if counts is not None else 0
+                if observed_n:
+                    spec = self.profile["features"][f]
+                    observed = counts / observed_n
+                    expected = np.concatenate([[0.0], spec["expected"], [0.0]])
+                    entry["psi"] = round(_psi(expected, observed), 4)
+                    outside = []
+                    for q in (10, 50, 90):
+                        entry[f"live_p{q}"], out = self._approx_quantile(f, q / 100)
+                        if out:
+                            outside.append(f"p{q}")
+                    # Quantiles past the training range are interpolated up to the live min/max
+                    entry["quantiles_outside_training_range"] = outside
+                    entry["live_min"] = self.live_min[f]
+                    entry["live_max"] = self.live_max[f]
+                    entry["training_p50"] = spec["p50"]
+                    if observed_n >= MIN_ALERT_SAMPLES:
+                        if entry["psi"] > PSI_ALERT:
+                            alerts.append("distribution")
+                        if entry["below_training_min"] + entry["above_training_max"]:
+                            alerts.append("out_of_range")
+                entry["observed"] = observed_n
+                entry["alerts"] = alerts
+                features[f] = entry
+            return {
+                "requests": n,
+                "pending": self._queue.qsize(),
+                "dropped": self.dropped,
+                "since": self.started_at,
+                "profile_loaded": self.profile is not None,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "min_alert_samples": MIN_ALERT_SAMPLES,
+                "unknown_keys": dict(self.unknown_keys),
+                "unknown_keys_other": self.unknown_other,
+                "drifted_features": sorted(f for f, e in features.items() if e["alerts"]),
+                "features": features,
+            }
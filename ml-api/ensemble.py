@@ -0,0 +1,66 @@
+#ensemble.py
+"""
+Model wrappers saved by training.py.
+Kept in their own light module so the Flask apps can unpickle them
+without importing the training code. Like MultiOutputRegressor, every
+wrapper's predict() returns an (n_rows, n_targets) array.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class BoosterEnsemble:
+    """One native Booster per target; drop-in for MultiOutputRegressor.predict()."""
+
+    def __init__(self, boosters, targets, features):
+        self.boosters = boosters
+        self.targets = list(targets)
+        self.features = list(features)
+
+    def predict(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features]
+        X = np.asarray(X, dtype=np.float32)
+        return np.column_stack([b.inplace_predict(X) for b in self.boosters])
+
+
+class MultiOutputBooster:
+    """A single multi-target Booster (vector-leaf trees) predicting all targets at once.
+
+    Targets are trained standardized (runs would otherwise dominate the shared
+    split gain); predict() maps them back with target_mean/target_std.
+    """
+
+    def __init__(self, booster, targets, features, target_mean, target_std):
+        self.booster = booster
+        self.targets = list(targets)
+        self.features = list(features)
+        self.target_mean = np.asarray(target_mean, dtype=np.float32)
+        self.target_std = np.asarray(target_std, dtype=np.float32)
+
+    @property
+    def boosters(self):
+        return [self.booster]
+
+    def predict(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features]
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(self.booster.inplace_predict(X)).reshape(len(X), len(self.targets))
+        return y * self.target_std + self.target_mean
+
+
+class LinearSurrogate:
+    """Linear model distilled from an XGBoost teacher: y = X @ coef + intercept."""
+
+    def __init__(self, coef, intercept, targets, features):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.targets = list(targets)
+        self.features = list(features)
+
+    def predict(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features]
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
@@ -0,0 +1,305 @@
+#ipl_cube.py
+"""
+Precomputed batter x bowler x venue x season aggregate cube over the cleaned
+IPL ball-by-ball data (ipl_deliveries joined to ipl_matches).
+
+Additive measures per cell: runs, balls, dismissals, boundaries, dots.
+Layout is columnar and array-backed: every dimension is dictionary-encoded to
+int32 codes, cells are sorted by (batter, bowler, venue, season), and each
+dimension has a posting-list index (cell order + offsets per code), so a slice
+touches only the matching cells before the roll-up.
+
+Updates are incremental: matches already in the cube are skipped, new
+deliveries are aggregated and merged into the existing cells.
+
+The IPL files carry no bowling-style column, so "vs left-arm pace" needs a
+bowler -> style mapping from elsewhere; with one, pass the matching bowlers as
+a --bowler list (or add the style as another dimension).
+
+Usage:
+    python ipl_cube.py build
+    python ipl_cube.py update                          # after new seasons are cleaned
+    python ipl_cube.py query --batter "V Kohli" --venue "Wankhede Stadium" --by season
+    python ipl_cube.py query --bowler "JJ Bumrah" --by batter --top 10
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# Paths
+# -------------------------------
+DATA_PATH = os.path.join("..", "datasets", "cleaned")
+CUBE_PATH = os.path.join("models", "ipl_cube.npz")
+
+DIMS = ['batter', 'bowler', 'venue', 'season']
+MEASURES = ['runs', 'balls', 'dismissals', 'boundaries', 'dots']
+
+# Column names differ between IPL dataset versions
+DELIVERY_ALIASES = {
+    'match_id': ['match_id', 'id'],
+    'batter': ['batter', 'batsman', 'striker'],
+    'bowler': ['bowler'],
+    'batsman_runs': ['batsman_runs', 'runs_off_bat'],
+    'total_runs': ['total_runs'],
+    'extras_type': ['extras_type', 'extra_type'],
+    'wide_runs': ['wide_runs', 'wides'],
+    'is_wicket': ['is_wicket', 'player_dismissed'],
+    'player_dismissed': ['player_dismissed'],
+}
+MATCH_ALIASES = {
+    'match_id': ['id', 'match_id'],
+    'venue': ['venue'],
+    'season': ['season', 'date'],
+}
+CHUNK_ROWS = 1_000_000
+
+# ---------- Loading ----------
+
+def _resolve(columns, aliases):
+    """Map canonical names to the first alias present in columns."""
+    found = {}
+    for name, options in aliases.items():
+        col = next((c for c in options if c in columns), None)
+        if col is not None:
+            found[name] = col
+    return found
+
+def load_matches(data_path=DATA_PATH):
+    """match_id -> (venue, season) from ipl_matches_cleaned.csv."""
+    path = os.path.join(data_path, "ipl_matches_cleaned.csv")
+    cols = _resolve(pd.read_csv(path, nrows=0).columns, MATCH_ALIASES)
+    df = pd.read_csv(path, usecols=list(cols.values())).rename(columns={v: k for k, v in cols.items()})
+    if cols.get('season') == 'date':
+        df['season'] = pd.to_datetime(df['season'], errors="coerce").dt.year
+    if pd.api.types.is_numeric_dtype(df['season']):
+        # 2019.0 -> "2019"; split seasons like "2007/08" are already text
+        df['season'] = df['season'].map(lambda v: "unknown" if pd.isna(v) else str(int(v)))
+    df['season'] = df['season'].astype(str)
+    df['venue'] = df['venue'].astype(str)
+    return df
+
+def delivery_chunks(data_path=DATA_PATH, chunk_rows=CHUNK_ROWS):
+    """Cleaned deliveries in bounded-memory chunks, with canonical column names."""
+    path = os.path.join(data_path, "ipl_deliveries_cleaned.csv")
+    cols = _resolve(pd.read_csv(path, nrows=0).columns, DELIVERY_ALIASES)
+    rename = {v: k for k, v in cols.items()}
+    for chunk in pd.read_csv(path, usecols=sorted(set(cols.values())), chunksize=chunk_rows,
+                             low_memory=False):
+        chunk = chunk.rename(columns=rename)
+        if 'is_wicket' in chunk and cols['is_wicket'] == 'player_dismissed':
+            chunk['is_wicket'] = chunk['player_dismissed'].notna().astype(np.int8)
+        yield chunk
+
+def aggregate_deliveries(deliveries, matches):
+    """Ball-level rows -> one row per (batter, bowler, venue, season) with additive measures."""
+    df = deliveries.merge(matches, on='match_id', how='left')
+    runs = pd.to_numeric(df['batsman_runs'], errors="coerce").fillna(0)
+    total = pd.to_numeric(df.get('total_runs', runs), errors="coerce").fillna(0)
+    if 'extras_type' in df:
+        wide = df['extras_type'].astype(str).str.lower().isin(['wides', 'wide'])
+    elif 'wide_runs' in df:
+        wide = pd.to_numeric(df['wide_runs'], errors="coerce").fillna(0) > 0
+    else:
+        wide = pd.Series(False, index=df.index)
+    out_batter = pd.to_numeric(df.get('is_wicket', 0), errors="coerce").fillna(0) > 0
+    if 'player_dismissed' in df:
+        # run outs can dismiss the non-striker; only count the batter's own dismissals
+        out_batter &= df['player_dismissed'].astype(str) == df['batter'].astype(str)
+
+    cells = pd.DataFrame({
+        'batter': df['batter'].astype(str),
+        'bowler': df['bowler'].astype(str),
+        'venue': df['venue'].fillna("unknown").astype(str),
+        'season': df['season'].fillna("unknown").astype(str),
+        'runs': runs.astype(np.int64),
+        'balls': (~wide).astype(np.int64),
+        'dismissals': out_batter.astype(np.int64),
+        'boundaries': runs.isin([4, 6]).astype(np.int64),
+        'dots': ((total == 0) & ~wide).astype(np.int64),
+    })
+    return cells.groupby(DIMS, sort=False, observed=True)[MEASURES].sum().reset_index()
+
+# ---------- Cube ----------
+
+class AggregateCube:
+    """Dictionary-encoded, sorted, columnar cube with per-dimension posting lists."""
+
+    def __init__(self, labels=None, codes=None, measures=None, match_ids=None):
+        self.labels = labels or {d: np.array([], dtype=object) for d in DIMS}
+        self.codes = codes or {d: np.array([], dtype=np.int32) for d in DIMS}
+        self.measures = measures or {m: np.array([], dtype=np.int64) for m in MEASURES}
+        self.match_ids = np.asarray(match_ids if match_ids is not None else [], dtype=np.float64)
+        self._lookup = {d: {v: i for i, v in enumerate(self.labels[d].tolist())} for d in DIMS}
+        self._build_indexes()
+
+    @property
+    def n_cells(self):
+        return len(self.measures['runs'])
+
+    def _build_indexes(self):
+        """Posting list per dimension: cells ordered by code, offsets[code] .. offsets[code+1]."""
+        self.order, self.offsets = {}, {}
+        for d in DIMS:
+            order = np.argsort(self.codes[d], kind="stable")
+            self.order[d] = order
+            self.offsets[d] = np.searchsorted(self.codes[d][order], np.arange(len(self.labels[d]) + 1))
+
+    # ----- updates -----
+
+    def _encode(self, dim, values):
+        """Codes for values, appending unseen labels to the dictionary."""
+        lookup = self._lookup[dim]
+        new = [v for v in pd.unique(values) if v not in lookup]
+        for v in new:
+            lookup[v] = len(lookup)
+        if new:
+            self.labels[dim] = np.concatenate([self.labels[dim], np.array(new, dtype=object)])
+        return pd.Series(values).map(lookup).to_numpy(dtype=np.int32)
+
+    def add(self, cells, match_ids=()):
+        """Merge aggregated cells (aggregate_deliveries output) into the cube."""
+        codes = {d: np.concatenate([self.codes[d], self._encode(d, cells[d].to_numpy())]) for d in DIMS}
+        measures = {m: np.concatenate([self.measures[m], cells[m].to_numpy(dtype=np.int64)])
+                    for m in MEASURES}
+        # Consolidate: sort by composite key and sum duplicate cells
+        key = np.ravel_multi_index([codes[d] for d in DIMS], [max(len(self.labels[d]), 1) for d in DIMS])
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        self.codes = {d: codes[d][order][starts] for d in DIMS}
+        self.measures = {m: np.add.reduceat(measures[m][order], starts) if len(starts) else measures[m]
+                         for m in MEASURES}
+        self.match_ids = np.union1d(self.match_ids, np.asarray(list(match_ids), dtype=np.float64))
+        self._build_indexes()
+
+    # ----- queries -----
+
+    def _cells_for(self, filters):
+        """Cell positions matching {dim: [labels]}, starting from the most selective index."""
+        sets = {}
+        for d, values in filters.items():
+            codes = [self._lookup[d][v] for v in values if v in self._lookup[d]]
+            sets[d] = np.asarray(codes, dtype=np.int32)
+        if not sets:
+            return np.arange(self.n_cells)
+        sizes = {d: int(sum(self.offsets[d][c + 1] - self.offsets[d][c] for c in codes))
+                 for d, codes in sets.items()}
+        lead = min(sizes, key=sizes.get)
+        cells = np.concatenate([self.order[lead][self.offsets[lead][c]:self.offsets[lead][c + 1]]
+                                for c in sets[lead]] or [np.array([], dtype=np.int64)])
+        for d, codes in sets.items():
+            if d != lead:
+                cells = cells[np.isin(self.codes[d][cells], codes)]
+        return np.sort(cells)
+
+    def query(self, filters=None, by=()):
+        """Slice on {dim: label or [labels]} and roll up to the `by` dimensions.
+
+        Returns a DataFrame with the summed measures plus strike rate,
+        average, dot-ball % and boundary %.
+        """
+        filters = {d: [v] if isinstance(v, str) else list(v) for d, v in (filters or {}).items() if v}
+        for d in list(filters) + list(by):
+            if d not in DIMS:
+                raise ValueError(f"unknown dimension: {d} (have {DIMS})")
+        cells = self._cells_for(filters)
+        by = list(by)
+        if by:
+            key = np.ravel_multi_index([self.codes[d][cells] for d in by],
+                                       [len(self.labels[d]) for d in by])
+            groups, inverse = np.unique(key, return_inverse=True)
+            out = {m: np.bincount(inverse, weights=self.measures[m][cells],
+                                  minlength=len(groups)).astype(np.int64) for m in MEASURES}
+            for d, codes in zip(by, np.unravel_index(groups, [len(self.labels[d]) for d in by])):
+                out[d] = self.labels[d][codes]
+            df = pd.DataFrame(out)[by + MEASURES]
+        else:
+            df = pd.DataFrame({m: [int(self.measures[m][cells].sum())] for m in MEASURES})
+        balls = df['balls'].replace(0, np.nan)
+        df['strike_rate'] = (100 * df['runs'] / balls).round(2)
+        df['average'] = (df['runs'] / df['dismissals'].replace(0, np.nan)).round(2)
+        df['dot_pct'] = (100 * df['dots'] / balls).round(2)
+        df['boundary_pct'] = (100 * df['boundaries'] / balls).round(2)
+        return df
+
+    # ----- persistence -----
+
+    def save(self, path=CUBE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {"match_ids": self.match_ids}
+        for d in DIMS:
+            arrays[f"labels__{d}"] = self.labels[d].astype(str)
+            arrays[f"codes__{d}"] = self.codes[d]
+        for m in MEASURES:
+            arrays[f"measure__{m}"] = self.measures[m]
+        # Write beside the target and rename over it, so the app never loads a half-written cube
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        with np.load(path, allow_pickle=False) as z:
+            return cls(labels={d: z[f"labels__{d}"].astype(object) for d in DIMS},
+                       codes={d: z[f"codes__{d}"] for d in DIMS},
+                       measures={m: z[f"measure__{m}"] for m in MEASURES},
+                       match_ids=z["match_ids"])
+
+# ---------- Build / Update ----------
+
+def update(cube=None, data_path=DATA_PATH, chunk_rows=CHUNK_ROWS):
+    """Fold cleaned deliveries from matches not yet in the cube into it."""
+    cube = cube or AggregateCube()
+    matches = load_matches(data_path)
+    seen = set(cube.match_ids.tolist())
+    added = set()
+    for chunk in delivery_chunks(data_path, chunk_rows):
+        chunk = chunk[~chunk['match_id'].isin(seen)]
+        if chunk.empty:
+            continue
+        cube.add(aggregate_deliveries(chunk, matches), chunk['match_id'].dropna().unique())
+        added.update(chunk['match_id'].dropna().unique().tolist())
+    print(f"[CUBE] {len(added)} new matches; {cube.n_cells} cells")
+    return cube
+
+# ---------- Main Runner ----------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="IPL batter x bowler x venue x season cube.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    for name in ("build", "update"):
+        p = sub.add_parser(name)
+        p.add_argument("--data-path", default=DATA_PATH)
+        p.add_argument("--cube", default=CUBE_PATH)
+    p = sub.add_parser("query")
+    p.add_argument("--cube", default=CUBE_PATH)
+    for d in DIMS:
+        p.add_argument(f"--{d}", action="append", help=f"filter on {d} (repeatable)")
+    p.add_argument("--by", nargs="*", default=[], choices=DIMS, help="roll up to these dimensions")
+    p.add_argument("--sort", default="runs")
+    p.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.action in ("build", "update"):
+        cube = AggregateCube.load(args.cube) if args.action == "update" and os.path.exists(args.cube) else None
+        cube = update(cube, args.data_path)
+        cube.save(args.cube)
+        print(f"[CUBE] Saved {args.cube}")
+        return
+
+    cube = AggregateCube.load(args.cube)
+    result = cube.query({d: getattr(args, d) for d in DIMS}, args.by)
+    print(result.sort_values(args.sort, ascending=False).head(args.top).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#pipeline.py
+"""
+Nightly clean + retrain pipeline for many leagues / age groups, run on a
+pluggable execution backend.
+
+The pipeline is a task graph built from a jobs config:
+- clean:<job>:<table>         one raw table -> <artifacts>/<job>/cleaned/
+- train:<job>:<format>:<tgt>  one booster per format and target -> models/parts/
+- assemble:<job>:<format>     4 boosters -> <format>_allround_xgb_model.pkl
+                              (+ meta, trained-row hashes, drift profile)
+Tasks only exchange files under the artifacts root (and small JSON-able
+results), so the same graph runs unchanged on:
+- local : concurrent.futures process (or --threads) pool on this machine
+- dask  : a dask.distributed cluster (--scheduler tcp://host:8786), or an
+          in-process LocalCluster when no scheduler is given
+On a real cluster the artifacts root and the raw folders must be on storage
+every worker mounts at the same path (NFS, EFS, ...), and workers need this
+ml-api folder on their PYTHONPATH.
+
+Jobs config (JSON):
+    {"artifacts": "/shared/crickstat",
+     "jobs": [{"name": "senior", "raw": "../datasets", "formats": ["odi", "t20", "test"]},
+              {"name": "u19", "raw": "/shared/raw/u19", "formats": ["odi"], "rounds": 100}]}
+
+Usage:
+    python pipeline.py --config jobs.json                          # local process pool
+    python pipeline.py --config jobs.json --backend dask           # in-process Dask cluster
+    python pipeline.py --config jobs.json --backend dask --scheduler tcp://10.0.0.5:8786
+    python pipeline.py --raw ../datasets --artifacts artifacts     # single job, no config
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+FORMATS = ["odi", "t20", "test"]
+
+# A node of the task graph: fn(**kwargs) runs after every task in deps succeeded
+Task = namedtuple("Task", ["key", "fn", "kwargs", "deps"])
+
+# ---------- Tasks (module-level so they pickle to any worker) ----------
+
+def clean_task(key, raw_path, out_dir):
+    import clean_data
+    os.makedirs(out_dir, exist_ok=True)
+    t0 = time.perf_counter()
+    stats = clean_data.clean_table(key, raw_path, out_dir)
+    return {"output": stats["output"], "rejected": stats["rejected"], "by_reason": stats["by_reason"],
+            "seconds": round(time.perf_counter() - t0, 3)}
+
+def train_target_task(fmt, target, data_path, parts_dir, rounds=None, nthread=None):
+    """Fit one target's booster on the format's training split and save it as UBJSON."""
+    import numpy as np
+    import xgboost as xgb
+    from training import FEATURES, N_ROUNDS, XGB_PARAMS, load_player_df, split_indices
+
+    t0 = time.perf_counter()
+    player_df = load_player_df(fmt, data_path)
+    train_idx, _ = split_indices(len(player_df))
+    X_train = player_df[FEATURES].to_numpy(dtype=np.float32)[train_idx]
+    y_train = player_df[target].to_numpy(dtype=np.float32)[train_idx]
+    del player_df
+    params = dict(XGB_PARAMS, nthread=nthread) if nthread else XGB_PARAMS
+    dtrain = xgb.QuantileDMatrix(X_train, label=y_train, feature_names=FEATURES)
+    booster = xgb.train(params, dtrain, num_boost_round=rounds or N_ROUNDS)
+    os.makedirs(parts_dir, exist_ok=True)
+    out_path = os.path.join(parts_dir, f"{fmt}_{target}.ubj")
+    booster.save_model(out_path)
+    return {"output": out_path, "rows": int(len(train_idx)), "seconds": round(time.perf_counter() - t0, 3)}
+
+def assemble_task(fmt, data_path, model_dir, parts_dir):
+    """Combine the per-target boosters into the served model and evaluate it on the held-out split."""
+    import numpy as np
+    import xgboost as xgb
+    from drift import profile_path, save_profile
+    from ensemble import BoosterEnsemble
+    from training import (FEATURES, TARGETS, impute_median, load_player_df, metrics_table,
+                          model_file_for, row_hashes, save_model, split_indices)
+
+    boosters = []
+    for target in TARGETS:
+        booster = xgb.Booster()
+        booster.load_model(os.path.join(parts_dir, f"{fmt}_{target}.ubj"))
+        boosters.append(booster)
+    model = BoosterEnsemble(boosters, TARGETS, FEATURES)
+
+    player_df = load_player_df(fmt, data_path, impute=False)
+    hashes = row_hashes(player_df)
+    impute_median(player_df, FEATURES)
+    train_idx, test_idx = split_indices(len(player_df))
+    y_test = player_df[TARGETS].to_numpy(dtype=np.float32)[test_idx]
+    metrics_df = metrics_table(y_test, model.predict(player_df.iloc[test_idx]))
+
+    model_file = model_file_for(fmt, os.path.join(model_dir, f"{fmt}_allround_xgb_model.pkl"))
+    save_profile(player_df.iloc[train_idx], profile_path(model_file))
+    meta = {
+        "format": fmt,
+        "mode": "pipeline",
+        "rows": int(len(hashes)),
+        "model_kind": type(model).__name__,
+        "n_trees": [int(b.num_boosted_rounds()) for b in boosters],
+        "holdout_metrics": metrics_df.to_dict("records"),
+    }
+    save_model(model, model_file, meta, hashes[train_idx], hashes[test_idx])
+    return {"output": model_file, "holdout_metrics": meta["holdout_metrics"]}
+
+# ---------- Pipeline Definition ----------
+
+def build_pipeline(jobs, artifacts):
+    """Task graph (in dependency order) for every job in the config.
+
+    Paths are made absolute here, against this process's working directory, so
+    remote workers (whose cwd may differ) resolve them the same way.
+    """
+    import clean_data
+    from training import TARGETS
+
+    artifacts = os.path.abspath(artifacts)
+    tasks = []
+    for job in jobs:
+        name = job["name"]
+        raw = os.path.abspath(job["raw"])
+        root = os.path.join(artifacts, name)
+        cleaned, model_dir = os.path.join(root, "cleaned"), os.path.join(root, "models")
+        parts_dir = os.path.join(model_dir, "parts")
+
+        cleaned_keys = set()
+        for key, folder, fname, _ in clean_data.RAW_TABLES:
+            raw_path = os.path.join(raw, folder, fname)
+            if os.path.exists(raw_path):
+                tasks.append(Task(f"clean:{name}:{key}", clean_task,
+                                  {"key": key, "raw_path": raw_path, "out_dir": cleaned}, []))
+                cleaned_keys.add(key)
+
+        for fmt in job.get("formats", FORMATS):
+            inputs = [f"{fmt}_batting", f"{fmt}_bowling"]
+            missing = [k for k in inputs if k not in cleaned_keys]
+            if missing:
+                print(f"[PIPELINE] {name}/{fmt}: no raw {', '.join(missing)}; training skipped")
+                continue
+            clean_deps = [f"clean:{name}:{k}" for k in inputs]
+            train_keys = []
+            for target in TARGETS:
+                key = f"train:{name}:{fmt}:{target}"
+                tasks.append(Task(key, train_target_task,
+                                  {"fmt": fmt, "target": target, "data_path": cleaned, "parts_dir": parts_dir,
+                                   "rounds": job.get("rounds"), "nthread": job.get("nthread")},
+                                  clean_deps))
+                train_keys.append(key)
+            tasks.append(Task(f"assemble:{name}:{fmt}", assemble_task,
+                              {"fmt": fmt, "data_path": cleaned, "model_dir": model_dir,
+                               "parts_dir": parts_dir}, train_keys))
+    return tasks
+
+# ---------- Backends ----------
+
+def _run_task(fn, kwargs, *deps):
+    """Worker entry point; deps are only there so the scheduler orders the task after them."""
+    return fn(**kwargs)
+
+class LocalBackend:
+    """Runs the graph on a concurrent.futures pool, submitting tasks as their deps finish."""
+
+    def __init__(self, workers=None, threads=False):
+        self.workers = workers
+        self.threads = threads
+
+    def run(self, tasks):
+        results, failures = {}, {}
+        by_key = {t.key: t for t in tasks}
+        waiting = dict(by_key)
+        running = {}
+        pool_cls = ThreadPoolExecutor if self.threads else ProcessPoolExecutor
+        with pool_cls(max_workers=self.workers) as pool:
+            while waiting or running:
+                for key, task in list(waiting.items()):
+                    if any(d in failures for d in task.deps):
+                        failures[key] = f"skipped: dependency failed ({next(d for d in task.deps if d in failures)})"
+                        del waiting[key]
+                    elif all(d in results for d in task.deps):
+                        running[pool.submit(_run_task, task.fn, task.kwargs)] = key
+                        del waiting[key]
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    try:
+                        results[key] = future.result()
+                        print(f"[PIPELINE] done {key}")
+                    except Exception as e:
+                        failures[key] = f"{type(e).__name__}: {e}"
+                        print(f"[PIPELINE] FAILED {key}: {failures[key]}")
+        return results, failures
+
+class DaskBackend:
+    """Submits the whole graph to a dask.distributed cluster; dependencies are passed as futures.
+
+    Dependents of a failed task never run; like LocalBackend, they are reported
+    as skipped rather than with the upstream exception.
+
+    Without a scheduler address an in-process LocalCluster (threads, no
+    subprocesses) is started, so the distributed code path can be run on one machine.
+    """
+
+    def __init__(self, scheduler=None, workers=None):
+        self.scheduler = scheduler
+        self.workers = workers
+
+    def _client(self):
+        try:
+            from dask.distributed import Client, LocalCluster
+        except ImportError:
+            raise SystemExit("the dask backend needs dask.distributed: pip install \"dask[distributed]\"")
+        if self.scheduler:
+            return Client(self.scheduler), None
+        cluster = LocalCluster(n_workers=self.workers or 2, threads_per_worker=1, processes=False,
+                               dashboard_address=None)
+        return Client(cluster), cluster
+
+    def run(self, tasks):
+        client, cluster = self._client()
+        results, failures = {}, {}
+        try:
+            futures = {}
+            for task in tasks:
+                futures[task.key] = client.submit(_run_task, task.fn, task.kwargs,
+                                                  *[futures[d] for d in task.deps],
+                                                  key=task.key.replace(":", "-"), pure=False)
+            for task in tasks:   # dependency order, so upstream failures are known first
+                key, future = task.key, futures[task.key]
+                failed_dep = next((d for d in task.deps if d in failures), None)
+                if failed_dep is not None:
+                    failures[key] = f"skipped: dependency failed ({failed_dep})"
+                    continue
+                try:
+                    results[key] = future.result()
+                    print(f"[PIPELINE] done {key}")
+                except Exception as e:
+                    failures[key] = f"{type(e).__name__}: {e}"
+                    print(f"[PIPELINE] FAILED {key}: {failures[key]}")
+        finally:
+            client.close()
+            if cluster is not None:
+                cluster.close()
+        return results, failures
+
+def make_backend(name, scheduler=None, workers=None, threads=False):
+    if name == "dask":
+        return DaskBackend(scheduler, workers)
+    return LocalBackend(workers, threads)
+
+# ---------- Main Runner ----------
+
+def run(jobs, artifacts, backend):
+    """Build and run the graph; writes <artifacts>/pipeline_run.json and returns it."""
+    tasks = build_pipeline(jobs, artifacts)
+    print(f"[PIPELINE] {len(tasks)} tasks for {len(jobs)} job(s) on {type(backend).__name__}")
+    t0 = time.perf_counter()
+    results, failures = backend.run(tasks)
+    summary = {
+        "backend": type(backend).__name__,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "tasks": len(tasks),
+        "succeeded": len(results),
+        "failed": failures,
+        "results": results,
+    }
+    os.makedirs(artifacts, exist_ok=True)
+    with open(os.path.join(artifacts, "pipeline_run.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"[PIPELINE] {len(results)}/{len(tasks)} tasks succeeded in {summary['seconds']}s")
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean + retrain many leagues on a local or distributed backend.")
+    parser.add_argument("--config", help="jobs config JSON (see module docstring)")
+    parser.add_argument("--raw", default=os.path.join("..", "datasets"), help="single job: raw datasets folder")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS, help="single job: formats")
+    parser.add_argument("--artifacts", default="artifacts", help="shared artifact root (overrides the config)")
+    parser.add_argument("--backend", choices=["local", "dask"], default="local")
+    parser.add_argument("--scheduler", help="dask scheduler address (default: in-process LocalCluster)")
+    parser.add_argument("--workers", type=int, help="pool size / LocalCluster workers")
+    parser.add_argument("--threads", action="store_true", help="local backend: thread pool instead of processes")
+    args = parser.parse_args(argv)
+
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+        jobs = config["jobs"]
+        artifacts = args.artifacts if args.artifacts != "artifacts" else config.get("artifacts", "artifacts")
+    else:
+        jobs = [{"name": "default", "raw": args.raw, "formats": args.formats}]
+        artifacts = args.artifacts
+
+    summary = run(jobs, artifacts, make_backend(args.backend, args.scheduler, args.workers, args.threads))
+    if summary["failed"]:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    # Go through the importable module so tasks pickle as pipeline.<fn>, not __main__.<fn>
+    import pipeline
+    pipeline.main()
@@ -0,0 +1,108 @@
+#profiling.py
+"""
+Per-stage profiling helpers for the ml-api tooling.
+Records wall time, CPU time and peak resident memory (RSS) for named stages
+so training/cleaning runs can report where time and memory go.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+# ---------- Memory Readers ----------
+
+def current_rss_mb():
+    """Current resident set size of this process in MB (None if unavailable)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    return max_rss_mb()
+
+def max_rss_mb():
+    """High-water mark RSS of this process in MB (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux/BSD report KB
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+# ---------- Stage Profiler ----------
+
+class StageProfiler:
+    """Collects wall/CPU time and peak RSS for each `with profiler.stage(name):` block.
+
+    Peak RSS is sampled by a background thread while the stage runs, so it is
+    the peak *inside* that stage rather than the process-wide high-water mark.
+    """
+
+    def __init__(self, interval=0.01, verbose=True):
+        self.interval = interval
+        self.verbose = verbose
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        start_rss = current_rss_mb()
+        peak = [start_rss or 0.0]
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(self.interval):
+                rss = current_rss_mb()
+                if rss is not None and rss > peak[0]:
+                    peak[0] = rss
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            stop.set()
+            sampler.join()
+            end_rss = current_rss_mb()
+            if end_rss is not None:
+                peak[0] = max(peak[0], end_rss)
+            record = {
+                "stage": name,
+                "wall_s": round(wall, 4),
+                "cpu_s": round(cpu, 4),
+                "start_rss_mb": None if start_rss is None else round(start_rss, 1),
+                "peak_rss_mb": None if start_rss is None else round(peak[0], 1),
+                "end_rss_mb": None if end_rss is None else round(end_rss, 1),
+            }
+            self.stages.append(record)
+            if self.verbose:
+                print(f"[STAGE] {name}: {record['wall_s']:.2f}s wall, "
+                      f"{record['cpu_s']:.2f}s cpu, peak RSS {record['peak_rss_mb']} MB")
+
+    def table(self):
+        """Stage records as a DataFrame (same layout as the metrics tables)."""
+        import pandas as pd
+        return pd.DataFrame(self.stages)
+
+    def report(self):
+        print("\n================ Stage Profile ================\n")
+        print(self.table().to_string(index=False))
+
+    def to_json(self, path, **extra):
+        payload = dict(extra, stages=self.stages)
+        with open(path, "w") as f:
+            json.dump(payload, f, indent=2)
@@ -0,0 +1,245 @@
+#quality.py
+"""
+Declarative, vectorized data-quality rules for the raw tables, run by
+clean_data before each table's transform.
+
+Every table has a list of rules over its raw column names:
+- numeric(col)              value present but not a number ("-" / blank count as missing)
+- in_range(col, lo, hi)     number outside [lo, hi]
+- at_most(a, b, factor)     cross-field invariant a <= b * factor
+Rules whose columns are absent are skipped, and missing values never fail a
+range or cross-field rule (imputation deals with those). A cross-field rule is
+not checked on a row where either operand already failed its type or range
+rule, so one bad cell is reported once.
+
+All rules are evaluated in one pass over columnar NumPy arrays (each column is
+parsed once) into a per-row bitmask. Rows that fail any rule are removed from
+the cleaned table and written, with their reason codes, to
+<cleaned>/quarantine/<table>_quarantine.csv.
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+QUARANTINE_DIR = "quarantine"
+MISSING_TOKENS = ["", "-", "--", "NA", "N/A", "na", "n/a", "null", "None"]
+MAX_RULES = 64   # one bit per rule in the row mask
+
+# ---------- Rule Constructors ----------
+
+def numeric(col):
+    return ("numeric", col, None, None, f"type_{col}")
+
+def in_range(col, lo=0, hi=None):
+    code = f"range_{col}" if hi is None else f"range_{col}_{lo}_{hi}"
+    return ("range", col, lo, hi, code)
+
+def at_most(col, other, factor=1):
+    code = f"{col}_gt_{other}" if factor == 1 else f"{col}_gt_{other}_x{factor:g}"
+    return ("at_most", col, other, factor, code)
+
+# ---------- Rules per Table ----------
+
+BATTING_STATS = ["matches", "innings", "not_out", "runs", "high_score", "hs", "average", "avg",
+                 "ball_faced", "strike_rate", "sr", "100s", "50", "50s", "0s", "4s", "6s"]
+BOWLING_STATS = ["mt", "in", "ov", "md", "bwe", "bwsr", "wk", "balls"]
+# Other allround columns (e.g. a "4/20" best-bowling figure) are left to transform_allround
+ALLROUND_STATS = ["mt", "runs", "hs", "bat_av", "100", "wk", "bowl_av", "5", "ct", "st"]
+
+RULES = {
+    "batting": (
+        [numeric(c) for c in BATTING_STATS]
+        + [in_range(c) for c in BATTING_STATS]
+        + [at_most("not_out", "innings"), at_most("innings", "matches", 2),
+           at_most("runs", "ball_faced", 6), at_most("high_score", "runs"),
+           at_most("hs", "runs"), at_most("100s", "innings"), at_most("50", "innings")]
+    ),
+    "bowling": (
+        [numeric(c) for c in BOWLING_STATS]
+        + [in_range(c) for c in BOWLING_STATS]
+        + [at_most("in", "mt", 2), at_most("wk", "balls"), at_most("md", "ov")]
+    ),
+    "allround": (
+        [numeric(c) for c in ALLROUND_STATS]
+        + [in_range(c) for c in ALLROUND_STATS]
+        + [at_most("hs", "runs"), at_most("100", "mt", 2)]
+    ),
+    "ipl_matches": [numeric("id"), in_range("result_margin")],
+    "ipl_deliveries": (
+        [numeric(c) for c in ["match_id", "inning", "over", "ball", "batsman_runs",
+                              "extra_runs", "total_runs", "is_wicket"]]
+        + [in_range("inning", 1, 6), in_range("over", 0, 20), in_range("ball", 1, 12),
+           in_range("batsman_runs", 0, 7), in_range("extra_runs", 0, 7),
+           in_range("total_runs", 0, 13), in_range("is_wicket", 0, 1),
+           at_most("batsman_runs", "total_runs")]
+    ),
+    "perf_bat": (
+        [numeric(c) for c in ["runs", "balls", "4s", "6s"]]
+        + [in_range(c) for c in ["runs", "balls", "4s", "6s"]]
+        + [at_most("runs", "balls", 6), at_most("boundary_runs", "runs")]
+    ),
+    "perf_ball": (
+        [numeric(c) for c in ["overs", "maidens", "runs", "wickets"]]
+        + [in_range(c) for c in ["overs", "maidens", "runs", "wickets"]]
+        + [at_most("wickets", "balls"), at_most("maidens", "overs")]
+    ),
+    "perf_match": [numeric("match_id")],
+}
+
+def rules_for(key):
+    """Rule list for a clean_data table key ("odi_batting" -> batting rules)."""
+    if key in RULES:
+        return RULES[key]
+    return RULES.get(key.rsplit("_", 1)[-1], [])
+
+# ---------- Columnar Evaluation ----------
+
+def _overs_to_balls(overs):
+    """Vectorized overs (10.2) -> balls (62)."""
+    whole = np.floor(overs)
+    return whole * 6 + np.round((overs - whole) * 10)
+
+# Columns some rules use, derived from others when the table lacks them: name -> [(sources, fn)]
+DERIVED = {
+    "balls": [(["ov"], lambda c: _overs_to_balls(c["ov"])),
+              (["overs"], lambda c: _overs_to_balls(c["overs"]))],
+    "boundary_runs": [(["4s", "6s"], lambda c: 4 * c["4s"] + 6 * c["6s"])],
+}
+
+class _Columns:
+    """Parses each raw column to float64 once; remembers which values were unparseable."""
+
+    def __init__(self, df):
+        self.df = df
+        self.values = {}
+        self.bad = {}
+
+    def _derivation(self, col):
+        return next(((sources, fn) for sources, fn in DERIVED.get(col, [])
+                     if all(c in self.df.columns for c in sources)), (None, None))
+
+    def __contains__(self, col):
+        return col in self.df.columns or self._derivation(col)[0] is not None
+
+    def sources(self, col):
+        """Raw columns a (possibly derived) column is computed from."""
+        return [col] if col in self.df.columns else self._derivation(col)[0]
+
+    def __getitem__(self, col):
+        if col not in self.values:
+            if col in self.df.columns:
+                self._parse(col)
+            else:
+                self.values[col] = self._derivation(col)[1](self)
+        return self.values[col]
+
+    def _parse(self, col):
+        s = self.df[col]
+        if pd.api.types.is_numeric_dtype(s):
+            self.values[col] = s.to_numpy(dtype=np.float64, na_value=np.nan)
+            self.bad[col] = np.zeros(len(s), dtype=bool)
+            return
+        text = s.astype("string").str.strip().str.rstrip("*")   # "183*" is a not-out high score
+        missing = text.isna() | text.isin(MISSING_TOKENS)
+        vals = pd.to_numeric(text.mask(missing), errors="coerce")
+        self.values[col] = vals.to_numpy(dtype=np.float64, na_value=np.nan)
+        self.bad[col] = (vals.isna() & ~missing).to_numpy(dtype=bool)
+
+    def unparseable(self, col):
+        self[col]
+        return self.bad[col]
+
+def _applicable(rule, df, cols):
+    """Type/range rules need the raw column; cross-field rules may use derived ones."""
+    kind, col, other = rule[:3]
+    if kind == "at_most":
+        return col in cols and other in cols
+    return col in df.columns
+
+def evaluate(df, rules):
+    """(bitmask per row, rule codes) for every applicable rule, in one pass over the columns.
+
+    Type and range rules run first; a cross-field rule then skips rows where
+    either operand (or a column it is derived from) already failed one.
+    """
+    cols = _Columns(df)
+    rules = [r for r in rules if _applicable(r, df, cols)]
+    if len(rules) > MAX_RULES:
+        raise ValueError(f"at most {MAX_RULES} rules per table (got {len(rules)})")
+    mask = np.zeros(len(df), dtype=np.uint64)
+    bad_cell = {}   # raw column -> rows that failed a type/range rule on it
+    for bit, (kind, col, a, b, code) in enumerate(rules):
+        if kind == "numeric":
+            failed = cols.unparseable(col)
+        elif kind == "range":
+            v = cols[col]
+            failed = v < a if a is not None else np.zeros(len(v), dtype=bool)
+            if b is not None:
+                failed |= v > b
+        else:
+            continue
+        bad_cell[col] = bad_cell.get(col, False) | failed
+        mask |= failed.astype(np.uint64) << np.uint64(bit)
+    for bit, (kind, col, a, b, code) in enumerate(rules):
+        if kind != "at_most":
+            continue
+        failed = cols[col] > cols[a] * b   # NaN on either side -> False
+        for src in cols.sources(col) + cols.sources(a):
+            if src in bad_cell:
+                failed &= ~bad_cell[src]
+        mask |= failed.astype(np.uint64) << np.uint64(bit)
+    return mask, [r[4] for r in rules]
+
+def reasons(mask, codes):
+    """';'-joined reason codes for each (non-zero) bitmask, decoded once per distinct mask."""
+    uniq, inverse = np.unique(mask, return_inverse=True)
+    text = np.array([";".join(c for i, c in enumerate(codes) if (int(m) >> i) & 1) for m in uniq],
+                    dtype=object)
+    return text[inverse]
+
+# ---------- Validation Stage ----------
+
+def validate(df, key, quarantine_dir=None):
+    """Split df into (kept rows, stats); rejected rows go to <quarantine_dir>/<key>_quarantine.csv.
+
+    stats: rows, rejected, per-reason counts, seconds and rows/s.
+    """
+    t0 = time.perf_counter()
+    mask, codes = evaluate(df, rules_for(key))
+    rejected = mask != 0
+    n_rejected = int(rejected.sum())
+
+    by_reason = {}
+    for bit, code in enumerate(codes):
+        n = int(((mask >> np.uint64(bit)) & np.uint64(1)).sum())
+        if n:
+            by_reason[code] = n
+
+    if quarantine_dir is not None:
+        path = os.path.join(quarantine_dir, f"{key}_quarantine.csv")
+        if n_rejected:
+            os.makedirs(quarantine_dir, exist_ok=True)
+            bad = df[rejected].copy()
+            bad.insert(0, "_reasons", reasons(mask[rejected], codes))
+            bad.insert(0, "_line", np.flatnonzero(rejected) + 2)   # CSV line (after the header)
+            bad.to_csv(path, index=False)
+        elif os.path.exists(path):
+            os.remove(path)   # stale quarantine from an earlier run
+
+    seconds = time.perf_counter() - t0
+    stats = {
+        "table": key,
+        "rows": int(len(df)),
+        "rejected": n_rejected,
+        "rules": len(codes),
+        "by_reason": by_reason,
+        "seconds": round(seconds, 4),
+        "rows_per_s": int(len(df) / seconds) if seconds > 0 else None,
+    }
+    top = ", ".join(f"{c} {n}" for c, n in sorted(by_reason.items(), key=lambda kv: -kv[1])[:3])
+    print(f"[DQ] {key}: {n_rejected}/{len(df)} rows quarantined"
+          f"{f' ({top})' if top else ''}, {stats['rows_per_s'] or 0:,} rows/s")
+    return df[~rejected] if n_rejected else df, stats
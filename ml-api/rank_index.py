@@ -0,0 +1,292 @@
+#rank_index.py
+"""
+Per-format percentile and leaderboard index.
+
+For each metric (career runs, strike rate, wickets, economy from the cleaned
+tables, plus the model's predicted values) the index keeps one sorted value
+array with the player ids aligned to it:
+- percentile of a value : binary search, O(log n)
+- top-N leaderboard     : slice from the "best" end, O(N)
+
+It is saved as models/<format>_rank_index.npz and refreshed incrementally:
+only players whose cleaned rows changed since the last build are re-predicted
+and re-inserted. When the model file itself changes (retrain, or a model that
+appeared after the first build), every player's predicted metrics are redone.
+
+Usage:
+    python rank_index.py --format t20            # build or refresh
+    python rank_index.py --format t20 --rebuild
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+# Kept light for the Flask apps: pandas/joblib/training are imported by refresh() only
+MODEL_PATH = os.path.join("models")
+FORMATS = ["odi", "t20", "test"]
+
+# -------------------------------
+# Metrics: name -> (source column, higher is better)
+# -------------------------------
+ACTUAL_METRICS = {
+    'runs': ('bat_runs', True),
+    'strike_rate': ('bat_strike_rate', True),
+    'wickets': ('bowl_wickets', True),
+    'economy': ('bowl_economy', False),
+}
+# Predicted metrics use the model's output column for the same target
+PREDICTED_METRICS = {
+    'pred_runs': (0, True),
+    'pred_strike_rate': (1, True),
+    'pred_wickets': (2, True),
+    'pred_economy': (3, False),
+}
+HIGHER_IS_BETTER = {**{m: hib for m, (_, hib) in ACTUAL_METRICS.items()},
+                    **{m: hib for m, (_, hib) in PREDICTED_METRICS.items()}}
+LABEL_COLUMNS = ['player', 'name', 'Player']
+
+def index_path(fmt):
+    return os.path.join(MODEL_PATH, f"{fmt}_rank_index.npz")
+
+# ---------- Index ----------
+
+class RankIndex:
+    """Sorted per-metric arrays with aligned player ids, plus per-player row hashes."""
+
+    def __init__(self, fmt, values=None, ids=None, row_ids=None, row_hash=None, labels=None,
+                 model_hash=""):
+        self.fmt = fmt
+        self.values = values or {}          # metric -> ascending float64 array
+        self.ids = ids or {}                # metric -> player ids aligned with values
+        self.row_ids = np.asarray(row_ids if row_ids is not None else [], dtype=np.float64)
+        self.row_hash = np.asarray(row_hash if row_hash is not None else [], dtype=np.uint64)
+        self.labels = labels or {}          # player id -> display name
+        self.model_hash = model_hash        # digest of the model behind the pred_* metrics
+
+    # ----- queries -----
+
+    def percentile(self, metric, value):
+        """Share of players at or below value, and the 'top x%' in the metric's direction."""
+        vals = self._metric(metric)
+        n = len(vals)
+        if n == 0:
+            return None
+        below = int(np.searchsorted(vals, value, side="left"))
+        at_or_below = int(np.searchsorted(vals, value, side="right"))
+        better = n - at_or_below if HIGHER_IS_BETTER[metric] else below
+        return {
+            "metric": metric,
+            "value": float(value),
+            "players": n,
+            "percentile": round(100.0 * at_or_below / n, 2),
+            "top_percent": round(100.0 * (better + 1) / n, 2),
+            "rank": better + 1,
+        }
+
+    def top(self, metric, n=10):
+        """Best n players for a metric."""
+        vals, ids = self._metric(metric), self.ids[metric]
+        if HIGHER_IS_BETTER[metric]:
+            vals, ids = vals[::-1], ids[::-1]  # views, no copy
+        return [{"rank": i + 1, "id": _id_out(pid), "player": self.labels.get(pid, _id_out(pid)),
+                 "value": float(v)}
+                for i, (pid, v) in enumerate(zip(ids[:n].tolist(), vals[:n].tolist()))]
+
+    def _metric(self, metric):
+        if metric not in self.values:
+            raise ValueError(f"unknown metric: {metric} (have {sorted(self.values)})")
+        return self.values[metric]
+
+    # ----- updates -----
+
+    def upsert(self, metric, ids, values):
+        """Replace the entries of `ids` with new values, keeping the array sorted.
+
+        Removal is one O(n) mask; insertion sorts only the k new values and merges
+        them in with searchsorted + insert (O(n + k log k)), not a full re-sort.
+        A NaN value removes the player from the metric.
+        """
+        ids = np.asarray(ids, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        old_vals = self.values.get(metric, np.empty(0))
+        old_ids = self.ids.get(metric, np.empty(0))
+        keep = ~np.isin(old_ids, ids)
+        old_vals, old_ids = old_vals[keep], old_ids[keep]
+        keep_new = ~np.isnan(values)
+        ids, values = ids[keep_new], values[keep_new]
+        order = np.argsort(values, kind="stable")
+        values, ids = values[order], ids[order]
+        pos = np.searchsorted(old_vals, values, side="right")
+        self.values[metric] = np.insert(old_vals, pos, values)
+        self.ids[metric] = np.insert(old_ids, pos, ids)
+
+    def remove(self, ids):
+        ids = np.asarray(ids, dtype=np.float64)
+        for metric in list(self.values):
+            keep = ~np.isin(self.ids[metric], ids)
+            self.values[metric], self.ids[metric] = self.values[metric][keep], self.ids[metric][keep]
+
+    # ----- persistence -----
+
+    def save(self, path):
+        arrays = {"row_ids": self.row_ids, "row_hash": self.row_hash,
+                  "label_ids": np.array(list(self.labels), dtype=np.float64),
+                  "labels": np.array([str(v) for v in self.labels.values()]),
+                  "model_hash": np.array(self.model_hash)}
+        for metric in self.values:
+            arrays[f"values__{metric}"] = self.values[metric]
+            arrays[f"ids__{metric}"] = self.ids[metric]
+        # Write beside the target and rename over it, so IndexCache (or a crash
+        # mid-write) never sees a half-written file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, fmt, path):
+        with np.load(path) as z:
+            values = {k[len("values__"):]: z[k] for k in z.files if k.startswith("values__")}
+            ids = {m: z[f"ids__{m}"] for m in values}
+            labels = dict(zip(z["label_ids"].tolist(), z["labels"].tolist()))
+            model_hash = str(z["model_hash"]) if "model_hash" in z.files else ""
+            return cls(fmt, values, ids, z["row_ids"], z["row_hash"], labels, model_hash)
+
+def _id_out(pid):
+    return int(pid) if float(pid).is_integer() else pid
+
+class IndexCache:
+    """Serves a saved index, reloading it when the .npz file is replaced by a refresh."""
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.path = index_path(fmt)
+        self._mtime = None
+        self._index = None
+
+    def get(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return None
+        if mtime != self._mtime:
+            self._index, self._mtime = RankIndex.load(self.fmt, self.path), mtime
+        return self._index
+
+# ---------- Build / Refresh ----------
+
+def _file_digest(path):
+    """SHA-1 of a file's bytes ("" if it doesn't exist)."""
+    if not os.path.exists(path):
+        return ""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _player_labels(fmt, data_path):
+    """id -> player name from the cleaned batting/bowling tables (where present)."""
+    import pandas as pd
+    labels = {}
+    for kind in ("bowling", "batting"):  # batting names win
+        path = os.path.join(data_path, f"{fmt}_{kind}_cleaned.csv")
+        header = pd.read_csv(path, nrows=0).columns
+        col = next((c for c in LABEL_COLUMNS if c in header), None)
+        if col is None:
+            continue
+        df = pd.read_csv(path, usecols=['id', col]).dropna()
+        labels.update(zip(df['id'].astype(np.float64), df[col].astype(str)))
+    return labels
+
+def refresh(fmt, data_path=None, model_file=None, rebuild=False):
+    """Build the index, or update it for players whose cleaned rows changed."""
+    import joblib
+    import pandas as pd
+    from training import DATA_PATH, FEATURES, impute_median, load_player_df, model_file_for, row_hashes
+
+    data_path = data_path or DATA_PATH
+    path = index_path(fmt)
+    index = None if rebuild or not os.path.exists(path) else RankIndex.load(fmt, path)
+
+    raw = load_player_df(fmt, data_path, impute=False)
+    raw = raw[~raw.index.duplicated(keep="last")]
+    ids = raw.index.to_numpy(dtype=np.float64)
+    hashes = row_hashes(raw)
+
+    if index is None:
+        index = RankIndex(fmt)
+        changed = np.ones(len(ids), dtype=bool)
+    else:
+        pos = pd.Index(index.row_ids).get_indexer(ids)
+        changed = pos < 0
+        changed[~changed] = index.row_hash[pos[~changed]] != hashes[~changed]
+        index.remove(np.setdiff1d(index.row_ids, ids))
+    changed_ids = ids[changed]
+    print(f"[INDEX] {fmt}: {len(changed_ids)} new/changed players of {len(ids)}")
+
+    if len(changed_ids):
+        delta = raw[changed]
+        for metric, (col, _) in ACTUAL_METRICS.items():
+            index.upsert(metric, changed_ids, delta[col].to_numpy(dtype=np.float64))
+
+    # A different model invalidates every prediction, not just the changed players'
+    model_file = model_file_for(fmt, model_file)
+    model_hash = _file_digest(model_file)
+    repredict = changed if model_hash == index.model_hash else np.ones(len(ids), dtype=bool)
+    if model_hash != index.model_hash:
+        if model_hash:
+            print(f"[INDEX] {fmt}: model changed; re-predicting all {len(ids)} players.")
+        for metric in PREDICTED_METRICS:
+            index.values.pop(metric, None)
+            index.ids.pop(metric, None)
+    if not model_hash:
+        print(f"[INDEX] No model at {model_file}; predicted metrics skipped.")
+    elif repredict.any():
+        imputed = raw.copy()
+        impute_median(imputed, FEATURES)
+        y_pred = joblib.load(model_file).predict(imputed[repredict])
+        for metric, (i, _) in PREDICTED_METRICS.items():
+            index.upsert(metric, ids[repredict], y_pred[:, i])
+    index.model_hash = model_hash
+
+    index.row_ids, index.row_hash = ids, hashes
+    index.labels = _player_labels(fmt, data_path)
+    os.makedirs(MODEL_PATH, exist_ok=True)
+    index.save(path)
+    print(f"[INDEX] Saved {path}")
+    return index
+
+def query(index, args):
+    """Answer a rank request: ?metric=..&value=.. (percentile) or ?metric=..&top=N (leaderboard)."""
+    metric = args.get("metric")
+    if not metric:
+        raise ValueError(f"metric is required (one of {sorted(index.values)})")
+    if args.get("value") is not None:
+        return index.percentile(metric, float(args["value"]))
+    top = int(args.get("top", 10))
+    if top < 1:
+        raise ValueError("top must be a positive integer")
+    return {"metric": metric, "top": index.top(metric, top)}
+
+# ---------- Main Runner ----------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build/refresh the percentile & leaderboard index.")
+    parser.add_argument("--format", choices=FORMATS + ["all"], default="all")
+    parser.add_argument("--data-path")
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args(argv)
+    for fmt in (FORMATS if args.format == "all" else [args.format]):
+        refresh(fmt, args.data_path, rebuild=args.rebuild)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+#serving.py
+"""
+Shared request-handling helpers for the per-format Flask apps.
+"""
+
+import csv
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Serve the lite model to everyone once this many requests are queued for a scoring slot
+LITE_OVERLOAD_QUEUE = int(os.environ.get("LITE_OVERLOAD_QUEUE", 1))
+
+# Largest what-if grid scored in one request
+MAX_GRID_POINTS = 100_000
+MAX_GRID_AXES = 16
+
+# -------------------------------
+# Admission control (ADMIT_*_<FORMAT> overrides the default for one app)
+# -------------------------------
+ADMIT_CONCURRENCY = 4          # requests scored at once
+ADMIT_QUEUE = 16               # requests allowed to wait for a slot; beyond that -> 503
+ADMIT_DEADLINE_MS = 2000       # queue budget when the caller sends no deadline
+DEADLINE_HEADER = "X-Request-Deadline-Ms"   # caller's remaining budget, in ms
+WAIT_WINDOW = 1024             # recent queue waits kept for the quantiles
+
+# Rows decoded and scored together by the streaming endpoints
+STREAM_BATCH_ROWS = 1024
+STREAM_READ_BYTES = 64 * 1024
+STREAM_MAX_LINE_BYTES = 64 * 1024   # longer lines are skipped and reported as errors
+
+def lite_path(model_path):
+    """Lite (distilled) model file that sits next to a model file.
+
+    models/odi_allround_xgb_model.pkl -> models/odi_allround_lite.pkl; any other
+    name gets a _lite suffix (teacher.pkl -> teacher_lite.pkl), never the input path.
+    """
+    stem = os.path.splitext(model_path)[0]
+    if stem.endswith("_xgb_model"):
+        stem = stem[:-len("_xgb_model")]
+    return stem + "_lite.pkl"
+
+def _truthy(value):
+    return str(value).lower() in ("1", "true", "yes")
+
+class LiteSwitch:
+    """Picks the full or the distilled lite model for each request.
+
+    The lite model is used when the request asks for it (?lite=1 or header
+    X-Prediction-Mode: lite) or when at least overload_queue requests are
+    waiting for a slot in `admission` (admission caps how many are scored at
+    once, so its queue is where overload shows). Without a lite model every
+    request gets the full one.
+    """
+
+    def __init__(self, model, lite_model=None, admission=None, overload_queue=LITE_OVERLOAD_QUEUE):
+        self.model = model
+        self.lite_model = lite_model
+        self.admission = admission
+        self.overload_queue = overload_queue
+        self.lite_served = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, model, model_path, admission=None):
+        path = lite_path(model_path)
+        lite_model = None
+        if os.path.exists(path):
+            lite_model = joblib.load(path)
+            print(f"Lite model loaded from {path}.")
+        return cls(model, lite_model, admission)
+
+    def _count_lite(self):
+        with self._lock:
+            self.lite_served += 1
+
+    def requested(self, req):
+        """(model, is_lite) from the request's lite flag only, for long-running streams."""
+        wants_lite = _truthy(req.args.get("lite")) or req.headers.get("X-Prediction-Mode") == "lite"
+        if wants_lite and self.lite_model is not None:
+            self._count_lite()
+            return self.lite_model, True
+        return self.model, False
+
+    @contextmanager
+    def pick(self, req):
+        """Yields (model, is_lite) for a Flask request."""
+        overloaded = self.admission is not None and self.admission.queue_depth >= self.overload_queue
+        wants_lite = _truthy(req.args.get("lite")) or req.headers.get("X-Prediction-Mode") == "lite"
+        use_lite = self.lite_model is not None and (wants_lite or overloaded)
+        if use_lite:
+            self._count_lite()
+        yield (self.lite_model if use_lite else self.model), use_lite
+
+    def metrics(self, fmt):
+        """Prometheus text exposition of lite-model availability and use."""
+        label = f'format="{fmt}"'
+        return "\n".join([
+            "# TYPE crickstat_lite_available gauge",
+            f"crickstat_lite_available{{{label}}} {int(self.lite_model is not None)}",
+            "# TYPE crickstat_lite_served_total counter",
+            f"crickstat_lite_served_total{{{label}}} {self.lite_served}",
+        ]) + "\n"
+
+# ---------- Admission Control ----------
+
+class Rejected(Exception):
+    """Request shed before scoring; reason is 'queue_full' or 'deadline'."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+def _env_int(name, fmt, default):
+    return int(os.environ.get(f"{name}_{fmt.upper()}", os.environ.get(name, default)))
+
+class AdmissionControl:
+    """Bounded queue in front of a format's scoring endpoints.
+
+    At most `concurrency` requests are scored at once and at most `max_queue`
+    wait for a slot. A request is rejected straight away when the queue is
+    full, and gives up waiting once its deadline (DEADLINE_HEADER, else
+    default_deadline_ms) has passed, so callers get a fast 503 instead of a
+    slow answer they have already abandoned.
+    """
+
+    def __init__(self, fmt, concurrency=ADMIT_CONCURRENCY, max_queue=ADMIT_QUEUE,
+                 default_deadline_ms=ADMIT_DEADLINE_MS):
+        self.fmt = fmt
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.default_deadline_ms = default_deadline_ms
+        self.active = 0
+        self.queue_depth = 0
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "deadline": 0}
+        self.wait_sum = 0.0
+        self.waits = deque(maxlen=WAIT_WINDOW)
+        self.service_s = 0.05   # moving average of scoring time, for Retry-After
+        self._cond = threading.Condition()
+
+    @classmethod
+    def for_format(cls, fmt):
+        """Limits from ADMIT_CONCURRENCY / ADMIT_QUEUE / ADMIT_DEADLINE_MS, per-format overrides first."""
+        return cls(fmt, _env_int("ADMIT_CONCURRENCY", fmt, ADMIT_CONCURRENCY),
+                   _env_int("ADMIT_QUEUE", fmt, ADMIT_QUEUE),
+                   _env_int("ADMIT_DEADLINE_MS", fmt, ADMIT_DEADLINE_MS))
+
+    def deadline_s(self, headers):
+        """Seconds the caller is still willing to wait (header value is relative ms)."""
+        try:
+            ms = float(headers.get(DEADLINE_HEADER))
+        except (TypeError, ValueError):
+            ms = self.default_deadline_ms
+        return max(ms, 0.0) / 1e3
+
+    def retry_after(self):
+        """Whole seconds until the current backlog should have drained."""
+        backlog = (self.queue_depth + self.active) / max(self.concurrency, 1)
+        return max(1, math.ceil(backlog * self.service_s))
+
+    @contextmanager
+    def slot(self, budget_s):
+        """Wait up to budget_s for a scoring slot; raises Rejected when shed.
+
+        A budget that is already spent (<= 0) is shed without taking a slot.
+        """
+        t0 = time.perf_counter()
+        with self._cond:
+            if budget_s <= 0:
+                self.shed["deadline"] += 1
+                raise Rejected("deadline", self.retry_after())
+            if self.active >= self.concurrency or self.queue_depth:
+                if self.queue_depth >= self.max_queue:
+                    self.shed["queue_full"] += 1
+                    raise Rejected("queue_full", self.retry_after())
+                self.queue_depth += 1
+                try:
+                    ready = self._cond.wait_for(lambda: self.active < self.concurrency, timeout=budget_s)
+                finally:
+                    self.queue_depth -= 1
+                if not ready:
+                    self.shed["deadline"] += 1
+                    raise Rejected("deadline", self.retry_after())
+            self.active += 1
+            self.admitted += 1
+            wait = time.perf_counter() - t0
+            self.wait_sum += wait
+            self.waits.append(wait)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self.service_s = 0.9 * self.service_s + 0.1 * (time.perf_counter() - start)
+                self._cond.notify()
+
+    def guard(self, view):
+        """Flask view decorator: admit the request or answer 503 with Retry-After."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import request  # only the Flask apps use the decorator
+            try:
+                with self.slot(self.deadline_s(request.headers)):
+                    return view(*args, **kwargs)
+            except Rejected as e:
+                body = {"error": "prediction service overloaded, retry later", "reason": e.reason}
+                return body, 503, {"Retry-After": str(e.retry_after)}
+        return wrapper
+
+    def metrics(self):
+        """Prometheus text exposition of queue depth, sheds and queue wait."""
+        with self._cond:
+            waits = np.array(self.waits) if self.waits else np.zeros(1)
+            label = f'format="{self.fmt}"'
+            lines = [
+                "# TYPE crickstat_queue_depth gauge",
+                f"crickstat_queue_depth{{{label}}} {self.queue_depth}",
+                "# TYPE crickstat_inflight gauge",
+                f"crickstat_inflight{{{label}}} {self.active}",
+                "# TYPE crickstat_admitted_total counter",
+                f"crickstat_admitted_total{{{label}}} {self.admitted}",
+                "# TYPE crickstat_shed_total counter",
+            ]
+            lines += [f'crickstat_shed_total{{{label},reason="{r}"}} {n}' for r, n in self.shed.items()]
+            lines += ["# TYPE crickstat_queue_wait_seconds summary"]
+            lines += [f'crickstat_queue_wait_seconds{{{label},quantile="{q}"}} {np.quantile(waits, q):.6f}'
+                      for q in (0.5, 0.9, 0.99)]
+            lines += [f"crickstat_queue_wait_seconds_sum{{{label}}} {self.wait_sum:.6f}",
+                      f"crickstat_queue_wait_seconds_count{{{label}}} {self.admitted}"]
+        return "\n".join(lines) + "\n"
+
+# ---------- Batched Predictions ----------
+
+def round_predictions(y, innings, not_outs):
+    """Vectorized version of the /predict rounding and batting-average logic.
+
+    y is the (n, 4) model output; innings/not_outs are per-row inputs.
+    Returns a dict of arrays keyed like the /predict response.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    runs = np.where(y[:, 0] > 1, np.rint(y[:, 0]), 0).astype(np.int64)
+    wickets = np.where(y[:, 2] > 0.5, np.rint(y[:, 2]), 0).astype(np.int64)
+    times_out = np.maximum(np.asarray(innings) - np.asarray(not_outs), 1)
+    return {
+        'runs': runs,
+        'average': np.round(runs / times_out, 2),
+        'strike_rate': np.round(y[:, 1], 2),
+        'wickets': wickets,
+        'economy': np.round(y[:, 3], 2),
+    }
+
+# ---------- Streaming Scoring ----------
+
+class _BadLine:
+    """A body line that could not be decoded; iter_records reports it as an error record."""
+
+    def __init__(self, reason):
+        self.reason = reason
+
+def _decode(line):
+    try:
+        return line.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return _BadLine(f"invalid UTF-8 at byte {e.start}")
+
+def _lines(stream, block_size=STREAM_READ_BYTES, max_line=STREAM_MAX_LINE_BYTES):
+    """Decoded lines from a file-like request body, read block by block as it arrives.
+
+    (readline() on a chunked WSGI input reads one byte per call.) A line longer
+    than max_line bytes is dropped as it streams in, so at most about
+    max_line + block_size bytes are buffered. Oversized and non-UTF-8 lines are
+    yielded as _BadLine instead of ending the stream.
+    """
+    too_long = _BadLine(f"line longer than {max_line} bytes")
+    pending = b""
+    skipping = False   # inside an oversized line, waiting for its newline
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        *complete, pending = (pending + block).split(b"\n")
+        for line in complete:
+            if skipping:
+                skipping = False   # tail of a line already reported
+            elif len(line) > max_line:
+                yield too_long
+            else:
+                text = _decode(line)
+                yield text if isinstance(text, _BadLine) else text + "\n"
+        if len(pending) > max_line:
+            if not skipping:
+                yield too_long
+                skipping = True
+            pending = b""
+    if pending and not skipping:
+        yield _decode(pending)
+
+def _csv_lines(lines, bad):
+    """Feed lines to csv, blanking bad ones (csv skips blank rows) and noting (line, reason)."""
+    for n, line in enumerate(lines, 1):
+        if isinstance(line, _BadLine):
+            bad.append((n, line.reason))
+            line = "\n"
+        yield line
+
+def iter_records(stream, content_type="application/x-ndjson"):
+    """Yield (line_no, dict or error string) from an NDJSON or CSV body, in input order.
+
+    CSV bodies need a header row naming the feature columns.
+    """
+    lines = _lines(stream)
+    if "csv" in (content_type or ""):
+        bad = []
+        reader = csv.DictReader(_csv_lines(lines, bad))
+        for row in reader:
+            while bad:
+                yield bad.pop(0)
+            yield reader.line_num, row
+        yield from bad
+        return
+    for n, line in enumerate(lines, 1):
+        if isinstance(line, _BadLine):
+            yield n, line.reason
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield n, f"invalid JSON: {e}"
+            continue
+        yield n, record if isinstance(record, dict) else "expected a JSON object"
+
+def _json_values(values):
+    """Array -> list for json.dumps, with NaN/inf as None (null): bare NaN is not valid JSON."""
+    if values.dtype.kind == "f" and not np.isfinite(values).all():
+        values = values.astype(object)
+        values[~np.isfinite(values.astype(np.float64))] = None
+    return values.tolist()
+
+def score_stream(model, records, features, batch_rows=STREAM_BATCH_ROWS, admission=None, deadline=None):
+    """Score records in fixed-size micro-batches, yielding one NDJSON line per input row.
+
+    Only one batch is held in memory, and output lines keep the input order.
+    Rows get the /predict output (missing features are 0, same rounding and
+    batting average; non-finite values become null) plus "line", and "id"
+    when the row has one. Bad rows yield {"line", "error"} in their place.
+    With `admission`, each batch takes a scoring slot so a long upload shares
+    the app fairly with single predictions. `deadline` is one absolute
+    time.monotonic() instant for the whole request (default: the admission
+    default from now); each batch waits only for the time left and raises
+    Rejected once it is spent.
+    """
+    if admission is not None and deadline is None:
+        deadline = time.monotonic() + admission.default_deadline_ms / 1e3
+    X = np.zeros((batch_rows, len(features)), dtype=np.float32)
+    meta = []        # (line_no, id, error) per input row of the batch, in order
+    n_rows = 0       # rows of X filled (error entries take no row)
+    innings_col, not_out_col = features.index('bat_innings'), features.index('bat_not_out')
+
+    def flush():
+        nonlocal n_rows
+        cols = {}
+        if n_rows:
+            batch = pd.DataFrame(X[:n_rows], columns=features)
+            if admission is not None:
+                with admission.slot(deadline - time.monotonic()):
+                    y = model.predict(batch)
+            else:
+                y = model.predict(batch)
+            out = round_predictions(y, X[:n_rows, innings_col], X[:n_rows, not_out_col])
+            cols = {k: _json_values(v) for k, v in out.items()}
+        i = 0
+        for line_no, rid, error in meta:
+            if error is not None:
+                yield json.dumps({"line": line_no, "error": error}) + "\n"
+                continue
+            result = {k: cols[k][i] for k in cols}
+            result["line"] = line_no
+            if rid is not None:
+                result["id"] = rid if not isinstance(rid, float) or math.isfinite(rid) else None
+            i += 1
+            yield json.dumps(result) + "\n"
+        meta.clear()
+        n_rows = 0
+
+    for line_no, record in records:
+        if isinstance(record, str):
+            meta.append((line_no, None, record))
+        else:
+            try:
+                X[n_rows] = [float(record.get(f) or 0) for f in features]
+            except (TypeError, ValueError) as e:
+                meta.append((line_no, None, f"non-numeric feature: {e}"))
+            else:
+                meta.append((line_no, record.get("id"), None))
+                n_rows += 1
+        if len(meta) == batch_rows:
+            yield from flush()
+    if meta:
+        yield from flush()
+
+def stream_response(model, req, features, admission=None):
+    """Generator for a Flask streaming response over the request body."""
+    deadline = time.monotonic() + admission.deadline_s(req.headers) if admission is not None else None
+    records = iter_records(req.stream, req.content_type)
+    try:
+        for line in score_stream(model, records, features, admission=admission, deadline=deadline):
+            yield line
+    except Rejected as e:
+        # Headers are already sent; report the shed in-band and stop
+        yield json.dumps({"error": "prediction service overloaded, retry later", "reason": e.reason,
+                          "retry_after": e.retry_after}) + "\n"
+
+# ---------- What-if Sweeps ----------
+
+def perturbation_grid(base, grid, features):
+    """Cartesian product of feature perturbations applied to one base row.
+
+    base: {feature: value} (missing keys are 0, like /predict)
+    grid: [{"feature": f, "delta": [...]}      # base + d
+           {"feature": f, "scale": [...]}      # base * s
+           {"feature": f, "values": [...]}]    # absolute values
+    Returns (X, axes, shape): row 0 of X is the unperturbed base row, followed by
+    the grid points in C order of `shape`. Malformed input raises ValueError.
+    """
+    if not isinstance(base, dict):
+        raise ValueError("base must be an object of feature values")
+    if not isinstance(grid, list) or not grid:
+        raise ValueError("grid must list at least one feature perturbation")
+    if len(grid) > MAX_GRID_AXES:
+        raise ValueError(f"grid has {len(grid)} axes (max {MAX_GRID_AXES})")
+    try:
+        base_vec = np.array([float(base.get(f, 0) or 0) for f in features], dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("base feature values must be numbers")
+    axes, axis_values, cols = [], [], []
+    for spec in grid:
+        if not isinstance(spec, dict):
+            raise ValueError("each grid entry must be an object")
+        f = spec.get("feature")
+        if f not in features:
+            raise ValueError(f"unknown feature: {f}")
+        modes = [m for m in ("delta", "scale", "values") if m in spec]
+        if len(modes) != 1:
+            raise ValueError(f"{f}: give exactly one of delta, scale or values")
+        mode = modes[0]
+        if not isinstance(spec[mode], list):
+            raise ValueError(f"{f}: {mode} must be a list of numbers")
+        try:
+            steps = np.asarray(spec[mode], dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"{f}: {mode} must be a list of numbers")
+        if steps.ndim != 1:
+            raise ValueError(f"{f}: {mode} must be a flat list of numbers")
+        if steps.size == 0:
+            raise ValueError(f"{f}: empty {mode} list")
+        col = features.index(f)
+        if mode == "delta":
+            vals = base_vec[col] + steps
+        elif mode == "scale":
+            vals = base_vec[col] * steps
+        else:
+            vals = steps
+        axes.append({"feature": f, mode: steps.tolist()})
+        axis_values.append(np.clip(vals, 0, None))  # stats can't go negative
+        cols.append(col)
+
+    shape = [len(v) for v in axis_values]
+    n_points = math.prod(shape)   # Python ints, so a huge grid can't wrap around
+    if n_points > MAX_GRID_POINTS:
+        raise ValueError(f"grid has {n_points} points (max {MAX_GRID_POINTS})")
+
+    X = np.tile(base_vec.astype(np.float32), (n_points + 1, 1))
+    mesh = np.meshgrid(*axis_values, indexing="ij")
+    for col, m in zip(cols, mesh):
+        X[1:, col] = m.ravel()  # later axes win if a feature is listed twice
+    return X, axes, shape
+
+def what_if(model, payload, features):
+    """Score a base row plus a perturbation grid in one batched predict.
+
+    Returns the response surface as flat arrays in C order of `shape`.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("body must be an object with base and grid")
+    X, axes, shape = perturbation_grid(payload.get("base") or {}, payload.get("grid") or [], features)
+    y = model.predict(pd.DataFrame(X, columns=features))
+    out = round_predictions(y, X[:, features.index('bat_innings')], X[:, features.index('bat_not_out')])
+    return {
+        "base": {k: v[0].item() for k, v in out.items()},
+        "axes": axes,
+        "shape": shape,
+        "surface": {k: v[1:].tolist() for k, v in out.items()},
+    }
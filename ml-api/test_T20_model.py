@@ -1,12 +1,7 @@
 import joblib
 import pandas as pd
 
-# -------------------------------
-# Load the trained model
-# -------------------------------
 model_file = "models/t20_allround_xgb_model.pkl"
-model = joblib.load(model_file)
-print("T20 all-rounder model loaded successfully!")
 
 # -------------------------------
 # Define sample input for testing
@@ -34,30 +29,41 @@ sample_input = {
     'bowl_balls_from_overs': 300
 }
 
-# Convert to DataFrame
-X_test = pd.DataFrame([sample_input])
+def main(model_file=model_file):
+    # -------------------------------
+    # Load the trained model
+    # -------------------------------
+    model = joblib.load(model_file)
+    print("T20 all-rounder model loaded successfully!")
 
-# -------------------------------
-# Make prediction
-# -------------------------------
-y_pred = model.predict(X_test)[0]
-
-# Round predictions and handle small values
-runs_pred = int(round(y_pred[0])) if y_pred[0] > 1 else 0
-strike_rate_pred = round(y_pred[1], 2)
-wickets_pred = int(round(y_pred[2])) if y_pred[2] > 0.5 else 0
-economy_pred = round(y_pred[3], 2)
-
-# Batting average calculation
-innings = sample_input['bat_innings']
-not_outs = sample_input['bat_not_out']
-times_out = max(innings - not_outs, 1)
-average_pred = round(runs_pred / times_out, 2)
-
-# Print results
-print("Predicted Results:")
-print(f"Runs Projection      : {runs_pred}")
-print(f"Batting Average      : {average_pred}")
-print(f"Strike Rate Projection: {strike_rate_pred}")
-print(f"Wickets Projection   : {wickets_pred}")
-print(f"Economy Projection   : {economy_pred}")
+    # Convert to DataFrame
+    X_test = pd.DataFrame([sample_input])
+
+    # -------------------------------
+    # Make prediction
+    # -------------------------------
+    y_pred = model.predict(X_test)[0]
+
+    # Round predictions and handle small values
+    runs_pred = int(round(y_pred[0])) if y_pred[0] > 1 else 0
+    strike_rate_pred = round(y_pred[1], 2)
+    wickets_pred = int(round(y_pred[2])) if y_pred[2] > 0.5 else 0
+    economy_pred = round(y_pred[3], 2)
+
+    # Batting average calculation
+    innings = sample_input['bat_innings']
+    not_outs = sample_input['bat_not_out']
+    times_out = max(innings - not_outs, 1)
+    average_pred = round(runs_pred / times_out, 2)
+
+    # Print results
+    print("Predicted Results:")
+    print(f"Runs Projection      : {runs_pred}")
+    print(f"Batting Average      : {average_pred}")
+    print(f"Strike Rate Projection: {strike_rate_pred}")
+    print(f"Wickets Projection   : {wickets_pred}")
+    print(f"Economy Projection   : {economy_pred}")
+
+
+if __name__ == "__main__":
+    main()
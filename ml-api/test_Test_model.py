@@ -1,10 +1,8 @@
 import joblib
 import pandas as pd
 
-# Load model
+# Model to load
 model_path = "models/test_allround_xgb_model.pkl"
-model = joblib.load(model_path)
-print("Model loaded successfully!")
 
 # Example input (all-rounder)
 sample_input = {
@@ -29,13 +27,22 @@ sample_input = {
     'bowl_balls_from_overs': 2400
 }
 
-# Convert to DataFrame
-X_test = pd.DataFrame([sample_input])
+def main(model_path=model_path):
+    # Load model
+    model = joblib.load(model_path)
+    print("Model loaded successfully!")
 
-# Predict
-y_pred = model.predict(X_test)[0]
-print("Predicted values:")
-print(f"Batting runs: {y_pred[0]:.2f}")
-print(f"Batting strike rate: {y_pred[1]:.2f}")
-print(f"Bowling wickets: {y_pred[2]:.2f}")
-print(f"Bowling economy: {y_pred[3]:.2f}")
+    # Convert to DataFrame
+    X_test = pd.DataFrame([sample_input])
+
+    # Predict
+    y_pred = model.predict(X_test)[0]
+    print("Predicted values:")
+    print(f"Batting runs: {y_pred[0]:.2f}")
+    print(f"Batting strike rate: {y_pred[1]:.2f}")
+    print(f"Bowling wickets: {y_pred[2]:.2f}")
+    print(f"Bowling economy: {y_pred[3]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
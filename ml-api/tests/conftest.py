@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# ml-api modules are imported by name (as the apps and scripts do)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_cleaned(path, n=300, seed=0, fmt="odi"):
+    """Small <fmt>_batting/_bowling_cleaned.csv pair with the columns training.py reads."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n)
+    innings = rng.integers(1, 200, size=n)
+    balls = innings * rng.integers(5, 40, size=n)
+    runs = (balls * rng.uniform(0.5, 1.3, size=n)).astype(int)
+    batting = pd.DataFrame({
+        "id": ids, "player": [f"P{i}" for i in ids], "matches": innings + 5, "innings": innings,
+        "not_out": innings // 10, "runs": runs, "high_score": np.minimum(runs, 180),
+        "ball_faced": balls, "strike_rate": np.round(100 * runs / balls, 2), "100s": runs // 3000,
+        "50": runs // 900, "0s": innings // 20, "4s": runs // 12, "6s": runs // 50,
+    })
+    overs = rng.integers(0, 1500, size=n)
+    wk = (overs * rng.uniform(0, 0.3, size=n)).astype(int)
+    bowling = pd.DataFrame({
+        "id": ids, "player": batting["player"], "mt": innings + 5, "in": innings,
+        "md": overs // 20, "bwe": np.round(rng.uniform(3, 9, size=n), 2),
+        "bwsr": np.round(overs * 6 / np.maximum(wk, 1), 2), "wk": wk, "balls_from_overs": overs * 6,
+    })
+    os.makedirs(path, exist_ok=True)
+    batting.to_csv(os.path.join(path, f"{fmt}_batting_cleaned.csv"), index=False)
+    bowling.to_csv(os.path.join(path, f"{fmt}_bowling_cleaned.csv"), index=False)
+    return batting, bowling
+
+
+@pytest.fixture(scope="session")
+def cleaned_dir(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("cleaned"))
+    write_cleaned(path)
+    return path
+
+
+@pytest.fixture(scope="session")
+def teacher_file(cleaned_dir, tmp_path_factory):
+    """A trained odi model saved under a name that does not end in _xgb_model.pkl."""
+    import training
+    out = str(tmp_path_factory.mktemp("models") / "teacher.pkl")
+    training.main(["--format", "odi", "--data-path", cleaned_dir, "--output", out])
+    return out
@@ -0,0 +1,134 @@
+import io
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from serving import DEADLINE_HEADER, AdmissionControl, Rejected, iter_records, score_stream, stream_response
+
+def _hold(admission, entered, release):
+    with admission.slot(5):
+        entered.set()
+        release.wait(5)
+
+
+def test_slot_sheds_when_queue_full_and_on_deadline():
+    admission = AdmissionControl("odi", concurrency=1, max_queue=1)
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(admission, entered, release))
+    holder.start()
+    entered.wait(5)
+
+    waiter_result = []
+
+    def wait_for_slot():
+        try:
+            with admission.slot(5):
+                waiter_result.append("admitted")
+        except Rejected as e:
+            waiter_result.append(e.reason)
+
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while admission.queue_depth == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    with pytest.raises(Rejected) as full:
+        with admission.slot(5):
+            pass
+    assert full.value.reason == "queue_full"
+
+    release.set()
+    holder.join(5)
+    waiter.join(5)
+    assert waiter_result == ["admitted"]
+
+    entered.clear()
+    release.clear()
+    holder = threading.Thread(target=_hold, args=(admission, entered, release))
+    holder.start()
+    entered.wait(5)
+    with pytest.raises(Rejected) as late:
+        with admission.slot(0.05):
+            pass
+    assert late.value.reason == "deadline"
+    release.set()
+    holder.join(5)
+
+    assert admission.shed == {"queue_full": 1, "deadline": 1}
+    assert admission.active == 0 and admission.queue_depth == 0
+
+
+def test_slot_caps_concurrency():
+    admission = AdmissionControl("odi", concurrency=2, max_queue=32)
+    peak, lock = [0], threading.Lock()
+
+    def work():
+        with admission.slot(5):
+            with lock:
+                peak[0] = max(peak[0], admission.active)
+            threading.Event().wait(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert peak[0] <= 2
+    assert admission.admitted == 12
+
+
+# ---------- Streaming scoring ----------
+
+
+def test_spent_budget_is_shed_without_a_slot():
+    admission = AdmissionControl("odi", concurrency=1, max_queue=1)
+    with pytest.raises(Rejected) as late:
+        with admission.slot(0):
+            pass
+    assert late.value.reason == "deadline"
+    assert admission.admitted == 0 and admission.shed["deadline"] == 1
+
+
+# ---------- Stream deadline ----------
+
+class SlowModel:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.batches = 0
+
+    def predict(self, X):
+        self.batches += 1
+        time.sleep(self.seconds)
+        return np.zeros((len(X), 4))
+
+
+def _body(n):
+    return io.BytesIO(b'{"bat_runs": 1}\n' * n)
+
+
+def test_stream_deadline_counts_down_across_batches():
+    admission = AdmissionControl("odi", concurrency=1, max_queue=0)
+    model = SlowModel(0.05)
+    lines = []
+    with pytest.raises(Rejected) as late:
+        for line in score_stream(model, iter_records(_body(100)), ['bat_innings', 'bat_not_out'],
+                                 batch_rows=1, admission=admission, deadline=time.monotonic() + 0.2):
+            lines.append(line)
+    assert late.value.reason == "deadline"
+    # Each batch is well under the budget, but the request as a whole is not
+    assert 1 <= model.batches < 100 and len(lines) == model.batches
+
+
+def test_stream_response_reports_deadline_in_band():
+    admission = AdmissionControl("odi", concurrency=1, max_queue=0)
+    req = SimpleNamespace(headers={DEADLINE_HEADER: "400"}, stream=_body(5000), content_type="application/x-ndjson")
+    model = SlowModel(0.3)
+    out = [json.loads(line) for line in stream_response(model, req, ['bat_innings', 'bat_not_out'], admission)]
+    # Batches start at ~0 s and ~0.3 s; the third would start after the 0.4 s deadline
+    assert model.batches == 2
+    assert len(out) == 2 * 1024 + 1 and out[-1]["reason"] == "deadline"
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+import bench_pipeline
+from quality import evaluate, reasons, rules_for
+
+
+def _tables(seed=0, n=2000):
+    rng = np.random.default_rng(seed)
+    batting, bowling, all_round = bench_pipeline.make_international(n, rng)
+    matches, deliveries = bench_pipeline.make_ipl(n * 5, rng)
+    bat, ball, _ = bench_pipeline.make_performance(n, rng)
+    return {"batting": batting, "bowling": bowling, "allround": all_round, "ipl_matches": matches,
+            "ipl_deliveries": deliveries, "perf_bat": bat, "perf_ball": ball}
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_clean_generators_satisfy_every_rule(monkeypatch, seed):
+    monkeypatch.setattr(bench_pipeline, "_dirty", lambda df, cols, rng, share=0: df)
+    for key, df in _tables(seed).items():
+        mask, codes = evaluate(df, rules_for(key))
+        bad = mask != 0
+        assert not bad.any(), (key, sorted(set(reasons(mask[bad], codes))))
+
+
+def test_only_the_injected_negatives_are_quarantined():
+    rejected = 0
+    for key, df in _tables().items():
+        mask, codes = evaluate(df, rules_for(key))
+        failed = set(";".join(reasons(mask[mask != 0], codes)).split(";")) - {""}
+        assert all(code.startswith("range_") for code in failed), (key, failed)
+        rejected += int((mask != 0).sum())
+    assert rejected > 0
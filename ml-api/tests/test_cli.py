@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import cli
+
+
+def test_imported_top_level_parses_importtime_lines():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   _io\n"
+              "import time:      3000 |      45000 | pandas.core.frame\n"
+              "import time:        80 |         80 |     numpy\n")
+    assert cli._imported_top_level(stderr) == {"_io", "pandas", "numpy"}
+
+
+def test_help_imports_no_heavy_modules():
+    trace = subprocess.run([sys.executable, "-X", "importtime", os.path.join(cli.HERE, "cli.py"), "--help"],
+                           cwd=cli.HERE, capture_output=True, text=True)
+    assert trace.returncode == 0 and "bench" in trace.stdout
+    imported = cli._imported_top_level(trace.stderr)
+    assert "argparse" in imported                 # the trace was parsed
+    assert not imported & set(cli.HEAVY_MODULES)
+
+
+def test_bench_startup_checks_budgets(monkeypatch, capsys):
+    # Generous budgets: this checks the report, not the speed of the test machine
+    monkeypatch.setattr(cli, "HELP_BUDGET_S", 60.0)
+    monkeypatch.setattr(cli, "SERVE_BUDGET_S", 120.0)
+    assert cli.bench_startup(runs=1) == 0
+    out = capsys.readouterr().out
+    assert "heavy imports: none OK" in out
+    assert all(f"serve {fmt}" in out for fmt in cli.FORMATS)   # timed, or skipped without a model
+
+    monkeypatch.setattr(cli, "HELP_BUDGET_S", 0.0)
+    assert cli.bench_startup(runs=1) == 1
+    assert "OVER BUDGET" in capsys.readouterr().out
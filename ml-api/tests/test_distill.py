@@ -0,0 +1,61 @@
+import hashlib
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import distill
+from serving import lite_path
+from training import FEATURES
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def test_lite_path_never_returns_the_model_path():
+    assert lite_path("models/odi_allround_xgb_model.pkl") == "models/odi_allround_lite.pkl"
+    assert lite_path("models/teacher.pkl") == "models/teacher_lite.pkl"
+    assert lite_path("teacher") == "teacher_lite.pkl"
+
+
+@pytest.mark.parametrize("kind", ["linear", "truncate", "trees"])
+def test_distil_keeps_teacher_and_writes_lite(kind, cleaned_dir, teacher_file):
+    before = _digest(teacher_file)
+    distill.main(["--format", "odi", "--data-path", cleaned_dir, "--model", teacher_file,
+                  "--kind", kind, "--trees", "5"])
+
+    assert _digest(teacher_file) == before
+    lite = joblib.load(lite_path(teacher_file))
+    X = pd.DataFrame(np.ones((3, len(FEATURES)), dtype=np.float32), columns=FEATURES)
+    assert lite.predict(X).shape == (3, 4)
+
+
+def test_refuses_to_overwrite_teacher(monkeypatch, cleaned_dir, teacher_file):
+    before = _digest(teacher_file)
+    monkeypatch.setattr(distill, "lite_path", lambda path: path)
+    with pytest.raises(SystemExit):
+        distill.main(["--format", "odi", "--data-path", cleaned_dir, "--model", teacher_file,
+                      "--kind", "linear"])
+    assert _digest(teacher_file) == before
+
+
+def test_truncate_keeps_first_trees(teacher_file):
+    teacher = joblib.load(teacher_file)
+    lite = distill.truncate(teacher, 3)
+    assert [b.num_boosted_rounds() for b in lite.boosters] == [3, 3, 3, 3]
+
+
+def test_linear_surrogate_fits_a_linear_teacher():
+    class Linear:
+        coef = np.arange(len(FEATURES) * 4, dtype=np.float64).reshape(len(FEATURES), 4) / 100
+
+        def predict(self, X):
+            return np.asarray(X, dtype=np.float64) @ self.coef + 1.0
+
+    X = np.random.default_rng(0).random((200, len(FEATURES))).astype(np.float32)
+    lite = distill.distil_linear(Linear(), X)
+    np.testing.assert_allclose(lite.predict(pd.DataFrame(X, columns=FEATURES)),
+                               Linear().predict(X), rtol=1e-3, atol=1e-3)
@@ -0,0 +1,70 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+import drift
+from drift import DriftMonitor, build_profile
+
+
+def _monitor():
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame({"a": rng.random(1000), "b": rng.random(1000)})
+    return DriftMonitor(["a", "b"], build_profile(X))
+
+
+def _drain(monitor, requests):
+    """Report once the sketch thread has folded in `requests` payloads."""
+    deadline = time.monotonic() + 5
+    while monitor.report()["requests"] < requests and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return monitor.report()
+
+
+def test_no_alerts_below_min_samples():
+    monitor = _monitor()
+    for _ in range(drift.MIN_ALERT_SAMPLES - 1):
+        monitor.observe({"a": 50.0})          # far out of range, b defaulted
+    report = _drain(monitor, drift.MIN_ALERT_SAMPLES - 1)
+    assert report["drifted_features"] == []
+
+    monitor.observe({"a": 50.0})
+    report = _drain(monitor, drift.MIN_ALERT_SAMPLES)
+    assert report["features"]["a"]["alerts"] == ["distribution", "out_of_range"]
+    assert report["features"]["b"]["alerts"] == ["defaulted"]
+
+
+def test_unknown_keys_are_capped_and_non_dicts_ignored():
+    monitor = _monitor()
+    monitor.observe(None)
+    monitor.observe([1, 2])
+    for i in range(drift.MAX_UNKNOWN_KEYS + 50):
+        monitor.observe({f"k{i}": 1, "a": 0.5})
+    report = _drain(monitor, drift.MAX_UNKNOWN_KEYS + 50)
+    assert report["requests"] == drift.MAX_UNKNOWN_KEYS + 50
+    assert len(report["unknown_keys"]) == drift.MAX_UNKNOWN_KEYS
+    assert report["unknown_keys_other"] == 50
+    assert report["errors"] == 0
+
+
+def test_shifted_traffic_is_not_capped_at_training_max():
+    monitor = _monitor()
+    rng = np.random.default_rng(4)
+    for v in rng.uniform(2, 3, size=200):
+        monitor.observe({"a": float(v), "b": 0.5})
+    a = _drain(monitor, 200)["features"]["a"]
+    assert a["above_training_max"] == 200
+    assert a["live_p10"] > 1 and a["live_p50"] > 1 and a["live_max"] > 2.9
+    assert a["quantiles_outside_training_range"] == ["p10", "p50", "p90"]
+    assert "distribution" in a["alerts"]
+
+
+def test_matching_traffic_stays_inside_training_bins():
+    monitor = _monitor()
+    rng = np.random.default_rng(5)
+    for v in rng.uniform(0.01, 0.99, size=500):
+        monitor.observe({"a": float(v), "b": float(v)})
+    a = _drain(monitor, 500)["features"]["a"]
+    assert a["quantiles_outside_training_range"] == []
+    assert abs(a["live_p50"] - 0.5) < 0.1
+    assert a["psi"] < drift.PSI_ALERT and a["alerts"] == []
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ipl_cube import DIMS, MEASURES, AggregateCube, aggregate_deliveries
+
+
+@pytest.fixture
+def ipl():
+    rng = np.random.default_rng(1)
+    n_matches, n = 30, 6000
+    matches = pd.DataFrame({
+        "match_id": np.arange(1, n_matches + 1),
+        "venue": rng.choice(["V1", "V2", "V3"], size=n_matches),
+        "season": rng.choice(["2019", "2020"], size=n_matches),
+    })
+    batter = rng.choice([f"B{i}" for i in range(12)], size=n)
+    runs = rng.choice([0, 1, 2, 4, 6], size=n)
+    wide = rng.random(n) < 0.05
+    wicket = rng.random(n) < 0.05
+    deliveries = pd.DataFrame({
+        "match_id": np.sort(rng.integers(1, n_matches + 1, size=n)),
+        "batter": batter,
+        "bowler": rng.choice([f"W{i}" for i in range(8)], size=n),
+        "batsman_runs": np.where(wide, 0, runs),
+        "total_runs": np.where(wide, 1, runs),
+        "extras_type": np.where(wide, "wides", ""),
+        "is_wicket": wicket.astype(int),
+        "player_dismissed": np.where(wicket, batter, ""),
+    })
+    return deliveries, matches
+
+
+def _sorted(df, cols):
+    return df.sort_values(cols).reset_index(drop=True)
+
+
+def test_incremental_build_equals_full_build(ipl):
+    deliveries, matches = ipl
+    full = AggregateCube()
+    full.add(aggregate_deliveries(deliveries, matches), deliveries["match_id"].unique())
+
+    incremental = AggregateCube()
+    for _, chunk in deliveries.groupby(deliveries["match_id"] % 4):
+        incremental.add(aggregate_deliveries(chunk, matches), chunk["match_id"].unique())
+
+    assert incremental.n_cells == full.n_cells
+    pd.testing.assert_frame_equal(_sorted(incremental.query(by=DIMS), DIMS),
+                                  _sorted(full.query(by=DIMS), DIMS))
+    np.testing.assert_array_equal(incremental.match_ids, full.match_ids)
+
+
+def test_totals_match_raw(ipl):
+    deliveries, matches = ipl
+    cube = AggregateCube()
+    cube.add(aggregate_deliveries(deliveries, matches))
+    total = cube.query().iloc[0]
+    wide = deliveries["extras_type"] == "wides"
+
+    assert total["runs"] == deliveries["batsman_runs"].sum()
+    assert total["balls"] == (~wide).sum()
+    assert total["dismissals"] == deliveries["is_wicket"].sum()
+
+
+def test_filtered_roll_up_matches_pandas(ipl):
+    deliveries, matches = ipl
+    cube = AggregateCube()
+    cube.add(aggregate_deliveries(deliveries, matches))
+
+    got = cube.query({"batter": "B3", "venue": ["V1", "V2"]}, by=["season"])
+    cells = aggregate_deliveries(deliveries, matches)
+    want = (cells[(cells["batter"] == "B3") & cells["venue"].isin(["V1", "V2"])]
+            .groupby("season")[MEASURES].sum().reset_index())
+    pd.testing.assert_frame_equal(_sorted(got[["season"] + MEASURES], ["season"]),
+                                  _sorted(want, ["season"]), check_dtype=False)
+
+
+def test_save_load_round_trip(ipl, tmp_path):
+    deliveries, matches = ipl
+    cube = AggregateCube()
+    cube.add(aggregate_deliveries(deliveries, matches), deliveries["match_id"].unique())
+    path = str(tmp_path / "cube.npz")
+    cube.save(path)
+
+    loaded = AggregateCube.load(path)
+    pd.testing.assert_frame_equal(loaded.query(by=["bowler"]), cube.query(by=["bowler"]))
+
+
+def test_failed_save_keeps_previous_cube(ipl, tmp_path, monkeypatch):
+    deliveries, matches = ipl
+    cube = AggregateCube()
+    cube.add(aggregate_deliveries(deliveries, matches), deliveries["match_id"].unique())
+    path = str(tmp_path / "cube.npz")
+    cube.save(path)
+
+    def broken_savez(f, **arrays):
+        f.write(b"PK\x03\x04 truncated")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(np, "savez_compressed", broken_savez)
+    with pytest.raises(OSError):
+        AggregateCube().save(path)
+    monkeypatch.undo()
+
+    assert AggregateCube.load(path).n_cells == cube.n_cells
+    assert [p.name for p in tmp_path.iterdir()] == ["cube.npz"]
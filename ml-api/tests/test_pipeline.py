@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+import bench_pipeline
+import pipeline
+from pipeline import DaskBackend, LocalBackend, Task, build_pipeline
+
+
+def ok(value):
+    return value
+
+
+def boom():
+    raise RuntimeError("bad table")
+
+
+GRAPH = [
+    Task("a", ok, {"value": 1}, []),
+    Task("b", boom, {}, []),
+    Task("c", ok, {"value": 3}, ["a", "b"]),
+    Task("d", ok, {"value": 4}, ["c"]),
+    Task("e", ok, {"value": 5}, ["a"]),
+]
+WANT_FAILURES = {
+    "b": "RuntimeError: bad table",
+    "c": "skipped: dependency failed (b)",
+    "d": "skipped: dependency failed (c)",
+}
+
+
+def _dask_backend():
+    pytest.importorskip("dask.distributed")
+    return DaskBackend(workers=2)
+
+
+@pytest.mark.parametrize("make_backend", [
+    lambda: LocalBackend(workers=2, threads=True),
+    lambda: LocalBackend(workers=2),
+    _dask_backend,
+], ids=["threads", "processes", "dask"])
+def test_backends_report_failures_and_skipped_dependents_alike(make_backend):
+    results, failures = make_backend().run(GRAPH)
+    assert results == {"a": 1, "e": 5}
+    assert failures == WANT_FAILURES
+
+
+def test_build_pipeline_uses_absolute_paths_and_skips_formats_without_raw(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bench_pipeline.generate_raw("raw", 2000)
+    os.remove(os.path.join("raw", "international", "t20_batting.csv"))   # t20 cannot be trained
+    tasks = build_pipeline([{"name": "u19", "raw": "raw", "formats": ["odi", "t20"]}], "artifacts")
+
+    keys = [t.key for t in tasks]
+    assert "assemble:u19:odi" in keys and "assemble:u19:t20" not in keys
+    for task in tasks:
+        for value in task.kwargs.values():
+            if isinstance(value, str) and os.sep in value:
+                assert os.path.isabs(value), (task.key, value)
+    # Every dependency comes before its dependents
+    seen = set()
+    for task in tasks:
+        assert set(task.deps) <= seen
+        seen.add(task.key)
+
+
+def test_run_trains_a_servable_model(tmp_path):
+    bench_pipeline.generate_raw(str(tmp_path / "raw"), 2000)
+    artifacts = str(tmp_path / "artifacts")
+    summary = pipeline.run([{"name": "senior", "raw": str(tmp_path / "raw"), "formats": ["odi"], "rounds": 5}],
+                           artifacts, LocalBackend(workers=2, threads=True))
+    assert summary["failed"] == {}
+    assert summary["succeeded"] == summary["tasks"]
+    model_file = summary["results"]["assemble:senior:odi"]["output"]
+    assert model_file.startswith(artifacts) and os.path.exists(model_file)
+    assert os.path.exists(os.path.join(artifacts, "pipeline_run.json"))
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+import quality
+
+
+def _reasons(df, key):
+    mask, codes = quality.evaluate(df, quality.rules_for(key))
+    return [set(r.split(";")) - {""} for r in quality.reasons(mask, codes)]
+
+
+def test_missing_tokens_and_not_out_star_pass():
+    df = pd.DataFrame({"matches": ["10", "-", " "], "innings": [8, 8, 8], "not_out": [1, 1, 1],
+                       "runs": [300, 300, 300], "high_score": ["77*", "80", ""]})
+    assert _reasons(df, "odi_batting") == [set(), set(), set()]
+
+
+def test_type_range_and_cross_field_rules():
+    df = pd.DataFrame({"matches": [10, 10, 10, 10], "innings": [8, 8, 8, 8],
+                       "not_out": [1, 9, 1, 1], "runs": [300, 300, "abc", -4]})
+    assert _reasons(df, "odi_batting") == [set(), {"not_out_gt_innings"}, {"type_runs"}, {"range_runs"}]
+
+
+def test_cross_field_rules_skip_failed_operands():
+    df = pd.DataFrame({"matches": [10, 10], "innings": [-1, "x"], "not_out": [3, 3],
+                       "100s": [1, 1], "50": [2, 2]})
+    assert _reasons(df, "t20_batting") == [{"range_innings"}, {"type_innings"}]
+
+
+def test_derived_operand_inherits_source_failure():
+    # balls comes from ov; a bad ov is reported once, not again as wk_gt_balls
+    df = pd.DataFrame({"ov": [-2.0, 10.0, 3.0], "wk": [5, 100, 5], "md": [1, 2, 9]})
+    assert _reasons(df, "test_bowling") == [{"range_ov"}, {"wk_gt_balls"}, {"md_gt_ov"}]
+
+
+def test_allround_text_columns_are_not_validated():
+    df = pd.DataFrame({"player": ["a", "b"], "mt": [5, 5], "runs": [100, 200],
+                       "bbi": ["4/20", "5/11"], **{f"extra{i}": ["t", "u"] for i in range(40)}})
+    assert _reasons(df, "odi_allround") == [set(), set()]
+
+
+def test_validate_quarantines_with_line_numbers(tmp_path):
+    df = pd.DataFrame({"match_id": [1, 1, 2], "inning": [1, 9, 2], "over": [0, 1, 2], "ball": [1, 2, 3],
+                       "batsman_runs": [4, 0, 6], "total_runs": [4, 0, 1]})
+    kept, stats = quality.validate(df, "ipl_deliveries", str(tmp_path))
+
+    assert kept.index.tolist() == [0]
+    assert stats["rejected"] == 2
+    assert stats["by_reason"] == {"range_inning_1_6": 1, "batsman_runs_gt_total_runs": 1}
+    quarantined = pd.read_csv(tmp_path / "ipl_deliveries_quarantine.csv")
+    assert quarantined["_line"].tolist() == [3, 4]
+    assert quarantined["_reasons"].tolist() == ["range_inning_1_6", "batsman_runs_gt_total_runs"]
+
+
+def test_validate_removes_stale_quarantine(tmp_path):
+    stale = tmp_path / "perf_match_quarantine.csv"
+    stale.write_text("old\n")
+    kept, stats = quality.validate(pd.DataFrame({"match_id": [1, 2]}), "perf_match", str(tmp_path))
+    assert stats["rejected"] == 0 and len(kept) == 2
+    assert not stale.exists()
+
+
+def test_reasons_decodes_each_bit():
+    mask = np.array([0, 1, 2, 3, 5], dtype=np.uint64)
+    assert quality.reasons(mask, ["a", "b", "c"]).tolist() == ["", "a", "b", "a;b", "a;c"]
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from rank_index import RankIndex, query
+
+
+def _entries(index, metric):
+    return dict(zip(index.ids[metric].tolist(), index.values[metric].tolist()))
+
+
+def test_upsert_matches_full_sort():
+    rng = np.random.default_rng(0)
+    index, truth = RankIndex("odi"), {}
+    for _ in range(200):
+        ids = rng.choice(500, size=rng.integers(1, 20), replace=False).astype(np.float64)
+        values = rng.normal(size=len(ids))
+        values[rng.random(len(ids)) < 0.2] = np.nan
+        index.upsert("runs", ids, values)
+        for pid, v in zip(ids.tolist(), values.tolist()):
+            if np.isnan(v):
+                truth.pop(pid, None)
+            else:
+                truth[pid] = v
+
+    assert _entries(index, "runs") == truth
+    assert np.all(np.diff(index.values["runs"]) >= 0)
+
+
+def test_nan_upsert_removes_player():
+    index = RankIndex("odi")
+    index.upsert("runs", [1, 2, 3], [10.0, 20.0, 30.0])
+    index.upsert("runs", [2], [np.nan])
+    assert _entries(index, "runs") == {1.0: 10.0, 3.0: 30.0}
+
+
+def test_percentile_and_top_direction():
+    index = RankIndex("odi")
+    index.upsert("runs", [1, 2, 3, 4], [10.0, 40.0, 20.0, 30.0])
+    index.upsert("economy", [1, 2, 3, 4], [6.0, 4.0, 5.0, 7.0])
+
+    assert [r["id"] for r in index.top("runs", 2)] == [2, 4]
+    assert [r["id"] for r in index.top("economy", 2)] == [2, 3]   # lower is better
+    assert index.percentile("runs", 40.0)["rank"] == 1
+    assert index.percentile("economy", 4.0)["rank"] == 1
+
+
+def test_query_rejects_non_positive_top():
+    index = RankIndex("odi")
+    index.upsert("runs", [1], [10.0])
+    assert query(index, {"metric": "runs", "top": "1"})["top"][0]["id"] == 1
+    for top in ("0", "-2598"):
+        with pytest.raises(ValueError):
+            query(index, {"metric": "runs", "top": top})
+
+
+def test_save_load_round_trip(tmp_path):
+    index = RankIndex("odi", labels={1.0: "A"}, model_hash="abc")
+    index.upsert("runs", [1, 2], [5.0, 3.0])
+    path = tmp_path / "idx.npz"
+    index.save(path)
+
+    loaded = RankIndex.load("odi", path)
+    assert _entries(loaded, "runs") == _entries(index, "runs")
+    assert loaded.labels == {1.0: "A"}
+    assert loaded.model_hash == "abc"
+
+
+def test_failed_save_keeps_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "idx.npz"
+    index = RankIndex("odi")
+    index.upsert("runs", [1], [10.0])
+    index.save(path)
+
+    def broken_savez(f, **arrays):
+        f.write(b"PK\x03\x04 truncated")
+        raise OSError("disk full")
+
+    index.upsert("runs", [2], [20.0])
+    monkeypatch.setattr(np, "savez", broken_savez)
+    with pytest.raises(OSError):
+        index.save(path)
+    monkeypatch.undo()
+
+    assert _entries(RankIndex.load("odi", path), "runs") == {1.0: 10.0}
+    assert [p.name for p in tmp_path.iterdir()] == ["idx.npz"]
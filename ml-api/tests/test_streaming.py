@@ -0,0 +1,109 @@
+import io
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import serving
+from serving import iter_records, round_predictions, score_stream
+
+FEATURES = ['bat_innings', 'bat_not_out', 'bat_runs', 'bowl_wickets']
+
+
+class SumModel:
+    """Deterministic stand-in: each output column is a linear function of the row."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        self.batches.append(len(X))
+        return np.column_stack([X[:, 2] * 1.5, X[:, 2] / 10, X[:, 3], X.sum(axis=1) / 100])
+
+
+def _ndjson(rows):
+    return io.BytesIO("".join(json.dumps(r) + "\n" for r in rows).encode())
+
+
+def _score(body, content_type="application/x-ndjson", **kwargs):
+    lines = score_stream(SumModel(), iter_records(body, content_type), FEATURES, **kwargs)
+    return [json.loads(line) for line in lines]
+
+
+def test_score_stream_matches_batch_predict():
+    rng = np.random.default_rng(2)
+    rows = [{"id": i, "bat_innings": int(rng.integers(1, 50)), "bat_not_out": int(rng.integers(0, 5)),
+             "bat_runs": float(rng.integers(0, 2000)), "bowl_wickets": float(rng.integers(0, 50))}
+            for i in range(25)]
+    model = SumModel()
+    out = [json.loads(line) for line in
+           score_stream(model, iter_records(_ndjson(rows)), FEATURES, batch_rows=8)]
+
+    X = pd.DataFrame(rows)[FEATURES].to_numpy(dtype=np.float32)
+    want = round_predictions(SumModel().predict(X), X[:, 0], X[:, 1])
+    assert [r["id"] for r in out] == list(range(25))
+    assert [r["line"] for r in out] == list(range(1, 26))
+    for key, values in want.items():
+        assert [r[key] for r in out] == values.tolist()
+    assert model.batches == [8, 8, 8, 1]
+
+
+def test_bad_rows_are_reported_in_input_order():
+    body = io.BytesIO(b'{"bat_runs": 10}\nnot json\n[1, 2]\n{"bat_runs": "x"}\n{"bat_runs": 20}\n')
+    out = _score(body, batch_rows=2)
+    assert [r["line"] for r in out] == [1, 2, 3, 4, 5]
+    assert ["error" in r for r in out] == [False, True, True, True, False]
+
+
+def test_batch_of_only_errors_skips_predict():
+    model = SumModel()
+    lines = list(score_stream(model, iter_records(io.BytesIO(b"x\ny\n")), FEATURES, batch_rows=2))
+    assert len(lines) == 2 and model.batches == []
+
+
+def test_invalid_utf8_line_does_not_end_the_stream():
+    body = io.BytesIO(b'{"bat_runs": 10}\n{"player": "J\xf6rg"}\n{"bat_runs": 20}\n')
+    out = _score(body)
+    assert [r["line"] for r in out] == [1, 2, 3]
+    assert out[1]["error"].startswith("invalid UTF-8")
+    assert out[2]["runs"] == 30
+
+
+def test_invalid_utf8_in_csv_body():
+    body = io.BytesIO(b"player,bat_runs\nA,10\nJ\xf6rg,20\nC,30\n")
+    out = _score(body, "text/csv")
+    assert [r["line"] for r in out] == [2, 3, 4]
+    assert "error" in out[1] and out[2]["runs"] == 45
+
+
+def test_non_finite_outputs_are_null():
+    raw = next(score_stream(SumModel(), iter_records(io.BytesIO(b'{"bat_innings": NaN, "bat_runs": 10}\n')),
+                            FEATURES))
+    assert "NaN" not in raw
+    assert json.loads(raw)["average"] is None
+
+
+def test_score_stream_takes_a_slot_per_batch():
+    admission = serving.AdmissionControl("odi", concurrency=1, max_queue=0)
+    rows = [{"bat_runs": i} for i in range(10)]
+    out = list(score_stream(SumModel(), iter_records(_ndjson(rows)), FEATURES, batch_rows=4,
+                            admission=admission, deadline=time.monotonic() + 5))
+    assert len(out) == 10
+    assert admission.admitted == 3
+
+
+def test_csv_body():
+    out = _score(io.BytesIO(b"id,bat_runs,bat_innings\n7,100,4\n8,,2\n"), "text/csv")
+    assert [(r["id"], r["line"]) for r in out] == [("7", 2), ("8", 3)]
+
+
+def test_oversized_lines_are_skipped_with_bounded_buffer(monkeypatch):
+    monkeypatch.setattr(serving._lines, "__defaults__", (16, 64))
+    body = io.BytesIO(b'{"bat_runs": 1}\n' + b"x" * 10_000 + b'\n{"bat_runs": 2}\n' + b"y" * 500)
+    records = list(iter_records(body))
+    assert records[0] == (1, {"bat_runs": 1})
+    assert records[1] == (2, "line longer than 64 bytes")
+    assert records[2] == (3, {"bat_runs": 2})
+    assert records[3] == (4, "line longer than 64 bytes")
@@ -0,0 +1,185 @@
+import argparse
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+import training
+from conftest import write_cleaned
+from profiling import StageProfiler
+from training import FEATURES, TARGETS, build_train_matrix, load_model_meta, load_player_df, train_shared
+
+
+@pytest.fixture(scope="module")
+def player_df(cleaned_dir):
+    return load_player_df("odi", cleaned_dir)
+
+
+# ---------- Shared / external-memory matrix ----------
+
+def test_shared_matrix_trains_every_target(player_df):
+    dtrain = build_train_matrix(player_df)
+    assert dtrain.num_row() == len(player_df) and dtrain.feature_names == FEATURES
+    y = player_df[TARGETS].to_numpy(dtype=np.float32)
+    model = train_shared(dtrain, y, num_boost_round=20)
+    pred = model.predict(player_df)
+    assert pred.shape == (len(player_df), len(TARGETS))
+    assert np.corrcoef(pred[:, 0], y[:, 0])[0, 1] > 0.9
+
+
+def test_external_memory_matrix_matches_in_memory(player_df, tmp_path):
+    pytest.importorskip("pyarrow")
+    y = player_df[TARGETS].to_numpy(dtype=np.float32)
+    in_memory = train_shared(build_train_matrix(player_df), y, num_boost_round=20)
+    external = build_train_matrix(player_df, str(tmp_path), chunk_rows=64)
+    assert isinstance(external, xgb.ExtMemQuantileDMatrix)
+    assert external.num_row() == len(player_df)
+    assert len(list(tmp_path.glob("chunk_*.parquet"))) == -(-len(player_df) // 64)
+    spilled = train_shared(external, y, num_boost_round=20)
+    np.testing.assert_allclose(spilled.predict(player_df), in_memory.predict(player_df), rtol=0.05, atol=1)
+
+
+# The failed matrix is still referenced by the traceback when its files are removed
+@pytest.mark.filterwarnings("ignore:.*external memory cache file:UserWarning")
+def test_external_memory_cache_is_removed_even_when_training_fails(cleaned_dir, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    cache = tmp_path / "cache"
+    args = ["--format", "odi", "--data-path", cleaned_dir, "--external-memory", str(cache), "--no-save"]
+    training.main(args)
+    assert os.listdir(cache) == []
+
+    def fail(*a, **k):
+        raise MemoryError("out of memory")
+
+    monkeypatch.setattr(training, "train_shared", fail)
+    with pytest.raises(MemoryError):
+        training.main(args)
+    assert os.listdir(cache) == []
+
+
+# ---------- Incremental refresh ----------
+
+def _with_new_rows(base_dir, out_dir, n_new=200, seed=7, edit=None):
+    """Copy of the cleaned tables at base_dir plus n_new players with fresh ids."""
+    os.makedirs(out_dir, exist_ok=True)
+    new_bat, new_bowl = write_cleaned(os.path.join(out_dir, "new"), n=n_new, seed=seed)
+    for frame in (new_bat, new_bowl):
+        frame["id"] += 100_000
+    if edit is not None:
+        edit(new_bat, new_bowl)
+    for table, new in (("batting", new_bat), ("bowling", new_bowl)):
+        old = pd.read_csv(os.path.join(base_dir, f"odi_{table}_cleaned.csv"))
+        pd.concat([old, new]).to_csv(os.path.join(out_dir, f"odi_{table}_cleaned.csv"), index=False)
+    return out_dir
+
+
+def _refresh_args(data_path, output, **overrides):
+    args = dict(format="odi", data_path=data_path, output=output, refresh_rounds=20, max_drift=1.5,
+                min_delta_rows=10, no_save=False, multi_output=False)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+@pytest.fixture
+def saved_model(cleaned_dir, teacher_file, tmp_path):
+    """A private copy of the session's trained model and its sidecar files."""
+    out = str(tmp_path / "model.pkl")
+    stem = os.path.splitext(teacher_file)[0]
+    for suffix in (".pkl", "_meta.json", "_rows.npy", "_holdout.npy"):
+        shutil.copy(stem + suffix, os.path.splitext(out)[0] + suffix)
+    return out
+
+
+def test_refresh_adds_trees_and_grows_the_held_out_set(cleaned_dir, saved_model, tmp_path):
+    _, meta, seen, holdout = load_model_meta(saved_model)
+    data = _with_new_rows(cleaned_dir, str(tmp_path / "data"))
+    assert training.refresh(_refresh_args(data, saved_model), StageProfiler())
+
+    model, new_meta, new_seen, new_holdout = load_model_meta(saved_model)
+    assert new_meta["refresh_count"] == 1
+    assert new_meta["n_trees"] == [n + 20 for n in meta["n_trees"]]
+    assert len(new_seen) + len(new_holdout) == len(seen) + len(holdout) + 200
+    assert set(holdout) <= set(new_holdout) and not set(new_seen) & set(new_holdout)
+    assert new_meta["refresh_original_holdout_metrics"] is not None
+
+
+def test_refresh_falls_back_on_drift(cleaned_dir, saved_model, tmp_path, capsys):
+    def shift(bat, bowl):
+        bat["runs"] *= 20
+    data = _with_new_rows(cleaned_dir, str(tmp_path / "data"), edit=shift)
+    before = os.path.getmtime(saved_model)
+    assert training.refresh(_refresh_args(data, saved_model), StageProfiler()) is False
+    assert "falling back to full rebuild" in capsys.readouterr().out
+    assert os.path.getmtime(saved_model) == before
+
+
+def test_refresh_falls_back_when_it_forgets_the_original_rows(cleaned_dir, saved_model, tmp_path, monkeypatch,
+                                                              capsys):
+    def mark_new(bat, bowl):
+        bat["matches"] += 10_000
+    data = _with_new_rows(cleaned_dir, str(tmp_path / "data"), edit=mark_new)
+
+    class Forgetful:
+        """Keeps the previous predictions on the new rows but is far off on every older row."""
+
+        def __init__(self, prev):
+            self.prev = prev
+            self.boosters = prev.boosters
+
+        def predict(self, X):
+            X = pd.DataFrame(np.asarray(X, dtype=np.float32), columns=FEATURES)
+            old = (X["bat_matches"] < 10_000).to_numpy()
+            return self.prev.predict(X) + 1000 * old[:, None]
+
+    monkeypatch.setattr(training, "train_shared",
+                        lambda dtrain, y, params, rounds, multi_output, init_model: Forgetful(init_model))
+    args = _refresh_args(data, saved_model, max_drift=1000)
+    assert training.refresh(args, StageProfiler()) is False
+    assert "(original held-out)" in capsys.readouterr().out
+
+
+# ---------- Cross-validation ----------
+
+def test_cross_validate_reports_mean_and_std_over_folds(player_df):
+    from sklearn.model_selection import KFold
+
+    mean_df, std_df = training.cross_validate(player_df, n_splits=3, n_jobs=3)
+    assert mean_df["Target"].tolist() == TARGETS and std_df["Target"].tolist() == TARGETS
+    assert list(mean_df.columns) == ["Target", "R² Score", "MAE", "MSE", "RMSE", "MAPE (%)"]
+
+    # Same folds, trained one at a time
+    X = player_df[FEATURES].to_numpy(dtype=np.float32)
+    y = player_df[TARGETS].to_numpy(dtype=np.float32)
+    full = xgb.QuantileDMatrix(X, feature_names=FEATURES)
+    folds = KFold(n_splits=3, shuffle=True, random_state=42).split(X)
+    mae = np.array([training._cv_fold(X, y, full, tr, te, 1, False)["MAE"].to_numpy() for tr, te in folds])
+    np.testing.assert_allclose(mean_df["MAE"], mae.mean(axis=0), rtol=1e-3)
+    np.testing.assert_allclose(std_df["MAE"], mae.std(axis=0), rtol=1e-3, atol=1e-3)
+    assert (std_df["MAE"] > 0).all()
+
+
+# ---------- Multi-output booster ----------
+
+def test_multi_output_booster_predicts_in_target_units(player_df, tmp_path):
+    import joblib
+    from ensemble import MultiOutputBooster
+
+    y = player_df[TARGETS].to_numpy(dtype=np.float32)
+    model = train_shared(build_train_matrix(player_df), y, num_boost_round=50, multi_output=True)
+    assert isinstance(model, MultiOutputBooster) and len(model.boosters) == 1
+    pred = model.predict(player_df)
+    assert pred.shape == y.shape
+    for i in range(len(TARGETS)):
+        assert np.corrcoef(pred[:, i], y[:, i])[0, 1] > 0.8, TARGETS[i]
+
+    path = tmp_path / "multi.pkl"
+    joblib.dump(model, path)
+    np.testing.assert_allclose(joblib.load(path).predict(player_df), pred, rtol=1e-6)
+
+    # Refresh-style continuation keeps the original target scaling
+    more = train_shared(build_train_matrix(player_df), y, num_boost_round=5, multi_output=True, init_model=model)
+    assert more.booster.num_boosted_rounds() == 55
+    np.testing.assert_array_equal(more.target_mean, model.target_mean)
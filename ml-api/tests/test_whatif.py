@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import serving
+from serving import AdmissionControl, LiteSwitch, perturbation_grid, what_if
+
+FEATURES = ['bat_innings', 'bat_not_out', 'bat_runs', 'bowl_wickets']
+
+
+class SumModel:
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return np.column_stack([X[:, 2] * 1.5, X[:, 2] / 10, X[:, 3], X.sum(axis=1) / 100])
+
+
+def _request(args=None, headers=None):
+    return SimpleNamespace(args=args or {}, headers=headers or {})
+
+
+# ---------- What-if grid ----------
+
+def test_perturbation_grid_layout():
+    X, axes, shape = perturbation_grid({"bat_runs": 100, "bat_innings": 10},
+                                       [{"feature": "bat_runs", "delta": [0, 50]},
+                                        {"feature": "bat_innings", "values": [5, 6, 7]}], FEATURES)
+    assert shape == [2, 3]
+    assert X[0].tolist() == [10, 0, 100, 0]
+    assert X[1:, 2].tolist() == [100, 100, 100, 150, 150, 150]
+    assert X[1:, 0].tolist() == [5, 6, 7, 5, 6, 7]
+
+
+def test_what_if_surface_matches_single_predictions():
+    payload = {"base": {"bat_runs": 100, "bat_innings": 10},
+               "grid": [{"feature": "bat_runs", "scale": [0.5, 2]}]}
+    out = what_if(SumModel(), payload, FEATURES)
+    assert out["shape"] == [2]
+    assert out["base"]["runs"] == 150
+    assert out["surface"]["runs"] == [75, 300]
+
+
+@pytest.mark.parametrize("base, grid", [
+    ([1], [{"feature": "bat_runs", "delta": [1]}]),
+    ({}, "bat_runs"),
+    ({}, [1]),
+    ({}, [{"feature": "bat_runs", "delta": 5}]),
+    ({}, [{"feature": "bat_runs", "delta": [{}]}]),
+    ({}, [{"feature": "bat_runs", "delta": [[1]]}]),
+    ({}, [{"feature": "bat_runs", "delta": [1, 2]}] * (serving.MAX_GRID_AXES + 1)),
+    ({}, [{"feature": "bat_runs", "delta": list(range(1000))}] * 16),
+    ({"bat_runs": {"a": 1}}, [{"feature": "bat_runs", "delta": [1]}]),
+])
+def test_perturbation_grid_rejects_bad_input(base, grid):
+    with pytest.raises(ValueError):
+        perturbation_grid(base, grid, FEATURES)
+
+
+# ---------- Lite switch ----------
+
+def test_lite_switch_serves_lite_on_request_and_counts_it():
+    full, lite = SumModel(), SumModel()
+    switch = LiteSwitch(full, lite, AdmissionControl("odi"))
+    with switch.pick(_request()) as (model, is_lite):
+        assert model is full and is_lite is False
+    with switch.pick(_request({"lite": "1"})) as (model, is_lite):
+        assert model is lite and is_lite is True
+    assert switch.requested(_request(headers={"X-Prediction-Mode": "lite"})) == (lite, True)
+    assert switch.lite_served == 2
+    assert 'crickstat_lite_served_total{format="odi"} 2' in switch.metrics("odi")
+
+
+def test_lite_switch_serves_lite_while_queueing():
+    admission = AdmissionControl("odi")
+    switch = LiteSwitch(SumModel(), SumModel(), admission, overload_queue=1)
+    admission.queue_depth = 1
+    with switch.pick(_request()) as (model, is_lite):
+        assert is_lite is True
+
+
+def test_lite_switch_without_lite_model():
+    full = SumModel()
+    switch = LiteSwitch(full)
+    with switch.pick(_request({"lite": "1"})) as (model, is_lite):
+        assert model is full and is_lite is False
+    text = switch.metrics("t20")
+    assert 'crickstat_lite_available{format="t20"} 0' in text
+    assert 'crickstat_lite_served_total{format="t20"} 0' in text
@@ -0,0 +1,585 @@
+#training.py
+"""
+Memory-lean training mode for the all-rounder models.
+
+Same data, features, targets and XGBoost settings as build_*_model.py, but:
+- cleaned CSVs are read column-selectively and downcast to float32
+- one quantized data matrix (QuantileDMatrix) is built and shared by all four
+  targets instead of MultiOutputRegressor building one DMatrix per target
+- optionally, the training matrix is built in external memory: training rows
+  are spilled to Parquet chunks and streamed into an ExtMemQuantileDMatrix whose
+  quantized pages live on disk (the merged float32 frame is still loaded first)
+- peak RSS is reported per stage
+
+Usage:
+    python training.py --format odi
+    python training.py --format t20 --external-memory cache/t20
+    python training.py --format odi --refresh      # add trees for new rows only
+    python training.py --format odi --cv 5         # parallel 5-fold CV, then build
+    python training.py --format odi --multi-output # one vector-leaf booster for all targets
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+from sklearn.model_selection import KFold, train_test_split
+
+from drift import profile_path, save_profile
+from ensemble import BoosterEnsemble, MultiOutputBooster
+from profiling import StageProfiler
+
+# -------------------------------
+# Paths
+# -------------------------------
+DATA_PATH = os.path.join("..", "datasets", "cleaned")
+MODEL_PATH = os.path.join("models")
+
+FORMATS = ["odi", "t20", "test"]
+
+# -------------------------------
+# Columns (mirrors build_*_model.py)
+# -------------------------------
+BAT_RENAME = {
+    'matches': 'bat_matches',
+    'innings': 'bat_innings',
+    'not_out': 'bat_not_out',
+    'runs': 'bat_runs',
+    'high_score': 'bat_high_score',
+    'ball_faced': 'bat_ballsFaced',
+    'strike_rate': 'bat_strike_rate',
+    '100s': 'bat_100s',
+    '50': 'bat_50',
+    '0s': 'bat_0s',
+    '4s': 'bat_4s',
+    '6s': 'bat_6s'
+}
+
+BOWL_RENAME = {
+    'mt': 'bowl_matches',
+    'in': 'bowl_innings',
+    'md': 'bowl_maidens',
+    'bwe': 'bowl_economy',
+    'bwsr': 'bowl_strike_rate',
+    'wk': 'bowl_wickets',
+    'balls_from_overs': 'bowl_balls_from_overs'
+}
+
+FEATURES = [
+    'bat_matches', 'bat_innings', 'bat_not_out', 'bat_runs', 'bat_high_score',
+    'bat_ballsFaced', 'bat_strike_rate', 'bat_100s', 'bat_50', 'bat_0s', 'bat_4s', 'bat_6s',
+    'bowl_matches', 'bowl_innings', 'bowl_maidens', 'bowl_economy', 'bowl_strike_rate',
+    'bowl_wickets', 'bowl_balls_from_overs'
+]
+
+TARGETS = ['bat_runs', 'bat_strike_rate', 'bowl_wickets', 'bowl_economy']
+
+# Native-API equivalent of the XGBRegressor settings in build_*_model.py
+XGB_PARAMS = {
+    'objective': 'reg:squarederror',
+    'tree_method': 'hist',
+    'learning_rate': 0.1,
+    'max_depth': 6,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'seed': 42
+}
+N_ROUNDS = 200
+
+# Trees added by --refresh fit only the new rows, so they take smaller steps
+REFRESH_PARAMS = dict(XGB_PARAMS, learning_rate=0.03)
+
+# ---------- Data Loading ----------
+
+def _read_float32(path, rename):
+    """Read only the id + renamed columns of a cleaned CSV, downcast to float32."""
+    wanted = set(rename) | {'id'}
+    df = pd.read_csv(path, usecols=lambda c: c in wanted)
+    df = df.rename(columns=rename)
+    for c in df.columns:
+        if c != 'id':
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype(np.float32)
+    return df
+
+def impute_median(df, cols):
+    """Median-impute in place; fully-NaN columns are filled with 0 (as the build scripts do)."""
+    fully_nan = 0
+    for c in cols:
+        median = df[c].median()
+        if pd.isna(median):
+            median = 0
+            fully_nan += 1
+        df[c] = df[c].fillna(median).astype(np.float32)
+    return fully_nan
+
+def load_player_df(fmt, data_path=DATA_PATH, impute=True):
+    """Merged float32 feature frame for one format (FEATURES columns only, indexed by player id),
+    median-imputed unless impute=False."""
+    batting_df = _read_float32(os.path.join(data_path, f"{fmt}_batting_cleaned.csv"), BAT_RENAME)
+    bowling_df = _read_float32(os.path.join(data_path, f"{fmt}_bowling_cleaned.csv"), BOWL_RENAME)
+    player_df = pd.merge(batting_df, bowling_df, on='id', how='outer')
+    del batting_df, bowling_df
+
+    for c in FEATURES:
+        if c not in player_df.columns:
+            player_df[c] = np.float32(np.nan)
+    player_df = player_df.set_index('id')[FEATURES]
+
+    if impute:
+        fully_nan = impute_median(player_df, FEATURES)
+        print(f"Median imputation applied. {fully_nan} columns were fully NaN & filled 0")
+    return player_df
+
+def row_hashes(df):
+    """Stable uint64 hash per row of raw (pre-imputation) feature values."""
+    return pd.util.hash_pandas_object(df[FEATURES], index=False).to_numpy(dtype=np.uint64)
+
+def split_indices(n_rows, test_size=0.2, random_state=42):
+    """Row indices of the same 80/20 split train_test_split gives the build scripts."""
+    return train_test_split(np.arange(n_rows), test_size=test_size, random_state=random_state)
+
+# ---------- Out-of-core Matrix ----------
+
+class ParquetChunkIter(xgb.DataIter):
+    """Streams float32 feature chunks from Parquet files into an external-memory DMatrix."""
+
+    def __init__(self, files, cache_prefix):
+        self._files = files
+        self._it = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._it == len(self._files):
+            return False
+        chunk = pd.read_parquet(self._files[self._it], columns=FEATURES)
+        input_data(data=chunk.to_numpy(dtype=np.float32), feature_names=FEATURES)
+        self._it += 1
+        return True
+
+    def reset(self):
+        self._it = 0
+
+def spill_to_parquet(df, cache_dir, chunk_rows):
+    """Write df to numbered Parquet chunks (requires pyarrow or fastparquet)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    files = []
+    for i, start in enumerate(range(0, len(df), chunk_rows)):
+        fpath = os.path.join(cache_dir, f"chunk_{i:05d}.parquet")
+        df.iloc[start:start + chunk_rows].to_parquet(fpath, index=False)
+        files.append(fpath)
+    return files
+
+def build_train_matrix(X_train, external_memory=None, chunk_rows=100_000, max_bin=256):
+    """One quantized matrix over the training rows, shared by every target."""
+    if external_memory is None:
+        return xgb.QuantileDMatrix(X_train.to_numpy(dtype=np.float32),
+                                   feature_names=FEATURES, max_bin=max_bin)
+    files = spill_to_parquet(X_train, external_memory, chunk_rows)
+    it = ParquetChunkIter(files, cache_prefix=os.path.join(external_memory, "xgb"))
+    return xgb.ExtMemQuantileDMatrix(it, max_bin=max_bin)
+
+# ---------- Model ----------
+
+def train_shared(dtrain, y_train, params=XGB_PARAMS, num_boost_round=N_ROUNDS,
+                 multi_output=False, init_model=None):
+    """Train on the shared quantized matrix.
+
+    Default: one booster per target column of y_train (BoosterEnsemble).
+    multi_output: one booster whose trees have vector leaves over all targets
+    (MultiOutputBooster). init_model continues boosting an existing model.
+    """
+    if multi_output:
+        if init_model is not None:
+            mean, std = init_model.target_mean, init_model.target_std
+        else:
+            mean, std = y_train.mean(axis=0), np.maximum(y_train.std(axis=0), 1e-6)
+        dtrain.set_label((y_train - mean) / std)
+        booster = xgb.train(dict(params, multi_strategy="multi_output_tree"), dtrain,
+                            num_boost_round=num_boost_round,
+                            xgb_model=init_model.booster if init_model else None)
+        return MultiOutputBooster(booster, TARGETS, FEATURES, mean, std)
+    boosters = []
+    for i in range(y_train.shape[1]):
+        dtrain.set_label(y_train[:, i])
+        boosters.append(xgb.train(params, dtrain, num_boost_round=num_boost_round,
+                                  xgb_model=init_model.boosters[i] if init_model else None))
+    return BoosterEnsemble(boosters, TARGETS, FEATURES)
+
+def tree_counts(model):
+    return [b.num_boosted_rounds() for b in model.boosters]
+
+# ---------- Evaluation ----------
+
+def safe_mape(y_true, y_pred):
+    """MAPE over non-zero targets (avoids division by zero)."""
+    y_true, y_pred = np.array(y_true), np.array(y_pred)
+    non_zero_mask = y_true != 0
+    if np.any(non_zero_mask):
+        return np.mean(np.abs((y_true[non_zero_mask] - y_pred[non_zero_mask]) / y_true[non_zero_mask]))
+    return np.nan
+
+def metrics_table(y_test, y_pred, targets=TARGETS):
+    """Per-target metrics in the same layout as the build scripts' metrics_df."""
+    y_test, y_pred = np.asarray(y_test), np.asarray(y_pred)
+    metrics_data = []
+    for i, target in enumerate(targets):
+        mse = mean_squared_error(y_test[:, i], y_pred[:, i])
+        metrics_data.append({
+            "Target": target,
+            "R² Score": round(r2_score(y_test[:, i], y_pred[:, i]), 4),
+            "MAE": round(mean_absolute_error(y_test[:, i], y_pred[:, i]), 4),
+            "MSE": round(mse, 4),
+            "RMSE": round(np.sqrt(mse), 4),
+            "MAPE (%)": round(safe_mape(y_test[:, i], y_pred[:, i]) * 100, 3)
+        })
+    return pd.DataFrame(metrics_data)
+
+# ---------- Cross-validation ----------
+
+def _cv_fold(X, y, full, train_idx, test_idx, nthread, multi_output):
+    """Train all targets on one fold, reusing the full matrix's quantile cuts."""
+    params = dict(XGB_PARAMS, nthread=nthread)
+    dtrain = xgb.QuantileDMatrix(X[train_idx], feature_names=FEATURES, ref=full)
+    model = train_shared(dtrain, y[train_idx], params, multi_output=multi_output)
+    return metrics_table(y[test_idx], model.predict(X[test_idx]))
+
+def cross_validate(player_df, n_splits=5, n_jobs=None, random_state=42, multi_output=False):
+    """K-fold CV of the all-rounder model, folds trained in parallel.
+
+    The frame is converted to float32 and sketched into a QuantileDMatrix once;
+    each fold slices the array and quantizes against those shared cut points.
+    Returns (mean, std) metrics tables in the metrics_table() layout.
+    """
+    X = player_df[FEATURES].to_numpy(dtype=np.float32)
+    y = player_df[TARGETS].to_numpy(dtype=np.float32)
+    full = xgb.QuantileDMatrix(X, feature_names=FEATURES)
+
+    folds = list(KFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(X))
+    cpus = os.cpu_count() or 1
+    n_jobs = min(n_jobs or cpus, n_splits)
+    nthread = max(1, cpus // n_jobs)
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        tables = list(pool.map(lambda f: _cv_fold(X, y, full, f[0], f[1], nthread, multi_output), folds))
+
+    stacked = pd.concat(tables)
+    mean_df = stacked.groupby("Target", sort=False).mean().round(4).reset_index()
+    std_df = stacked.groupby("Target", sort=False).std(ddof=0).round(4).reset_index()
+    return mean_df, std_df
+
+# ---------- Model Benchmark ----------
+
+def benchmark_models(fmt, data_path=DATA_PATH, latency_calls=200):
+    """Compare MultiOutputRegressor, BoosterEnsemble and MultiOutputBooster on one format.
+
+    Returns (summary_df, accuracy_df): train time, single-row predict latency (as the
+    Flask apps call it), batch throughput and pickled size; and per-target metrics.
+    """
+    import pickle
+    import time
+    from sklearn.multioutput import MultiOutputRegressor
+    from xgboost import XGBRegressor
+
+    player_df = load_player_df(fmt, data_path)
+    train_idx, test_idx = split_indices(len(player_df))
+    X_train, X_test = player_df.iloc[train_idx], player_df.iloc[test_idx]
+    y = player_df[TARGETS].to_numpy(dtype=np.float32)
+    y_train, y_test = y[train_idx], y[test_idx]
+
+    def fit_legacy():
+        return MultiOutputRegressor(XGBRegressor(
+            n_estimators=N_ROUNDS, learning_rate=0.1, max_depth=6,
+            subsample=0.8, colsample_bytree=0.8, random_state=42
+        )).fit(X_train, y_train)
+
+    def fit_shared(multi_output):
+        dtrain = xgb.QuantileDMatrix(X_train.to_numpy(dtype=np.float32), feature_names=FEATURES)
+        return train_shared(dtrain, y_train, multi_output=multi_output)
+
+    candidates = {
+        "MultiOutputRegressor": fit_legacy,
+        "BoosterEnsemble": lambda: fit_shared(False),
+        "MultiOutputBooster": lambda: fit_shared(True),
+    }
+    row = pd.DataFrame([X_test.iloc[0].to_dict()], columns=FEATURES)
+    summary, accuracy = [], []
+    for name, fit in candidates.items():
+        t0 = time.perf_counter()
+        model = fit()
+        train_s = time.perf_counter() - t0
+
+        latencies = []
+        for _ in range(latency_calls):
+            t0 = time.perf_counter()
+            model.predict(row)
+            latencies.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        y_pred = model.predict(X_test)
+        batch_s = time.perf_counter() - t0
+
+        summary.append({
+            "Model": name,
+            "Train (s)": round(train_s, 3),
+            "Predict p50 (ms)": round(np.percentile(latencies, 50) * 1e3, 3),
+            "Predict p99 (ms)": round(np.percentile(latencies, 99) * 1e3, 3),
+            "Batch rows/s": int(len(X_test) / max(batch_s, 1e-9)),
+            "Size (KB)": round(len(pickle.dumps(model)) / 1024, 1),
+        })
+        metrics_df = metrics_table(y_test, y_pred)
+        metrics_df.insert(0, "Model", name)
+        accuracy.append(metrics_df)
+    return pd.DataFrame(summary), pd.concat(accuracy, ignore_index=True)
+
+# ---------- Model Metadata ----------
+
+def model_file_for(fmt, output=None):
+    return output or os.path.join(MODEL_PATH, f"{fmt}_allround_xgb_model.pkl")
+
+def _sidecar_paths(model_file):
+    stem = os.path.splitext(model_file)[0]
+    return stem + "_meta.json", stem + "_rows.npy", stem + "_holdout.npy"
+
+def save_model(model, model_file, meta, hashes, holdout):
+    """Save the model plus its metadata (held-out metrics), trained-row hashes and
+    held-out-row hashes (the rows behind holdout_metrics, never trained on)."""
+    os.makedirs(os.path.dirname(model_file) or ".", exist_ok=True)
+    joblib.dump(model, model_file)
+    meta_file, rows_file, holdout_file = _sidecar_paths(model_file)
+    with open(meta_file, "w") as f:
+        json.dump(meta, f, indent=2)
+    np.save(rows_file, np.unique(hashes))
+    np.save(holdout_file, np.unique(holdout))
+
+def load_model_meta(model_file):
+    """(model, meta, trained-row hashes, held-out-row hashes) of a saved model,
+    or None if any piece is missing."""
+    meta_file, rows_file, holdout_file = _sidecar_paths(model_file)
+    if not all(os.path.exists(p) for p in (model_file, meta_file, rows_file, holdout_file)):
+        return None
+    with open(meta_file) as f:
+        meta = json.load(f)
+    return joblib.load(model_file), meta, np.load(rows_file), np.load(holdout_file)
+
+def as_booster_ensemble(model):
+    """Wrap a MultiOutputRegressor of XGBRegressors as a BoosterEnsemble (no-op for our wrappers)."""
+    if isinstance(model, (BoosterEnsemble, MultiOutputBooster)):
+        return model
+    boosters = [est.get_booster() for est in model.estimators_]
+    return BoosterEnsemble(boosters, TARGETS, FEATURES)
+
+# ---------- Full Build ----------
+
+def full_build(args, prof):
+    with prof.stage("load+merge+impute"):
+        player_df = load_player_df(args.format, args.data_path, impute=False)
+        hashes = row_hashes(player_df)
+        fully_nan = impute_median(player_df, FEATURES)
+        print(f"Median imputation applied. {fully_nan} columns were fully NaN & filled 0")
+
+    cv_mean = cv_std = None
+    if args.cv:
+        with prof.stage(f"cross-validate ({args.cv} folds)"):
+            cv_mean, cv_std = cross_validate(player_df, args.cv, args.cv_jobs,
+                                             multi_output=args.multi_output)
+        print(f"\n================ {args.cv}-Fold CV Metrics (mean) ================\n")
+        print(cv_mean.to_string(index=False))
+        print(f"\n================ {args.cv}-Fold CV Metrics (std) ================\n")
+        print(cv_std.to_string(index=False))
+        if args.cv_only:
+            return
+
+    with prof.stage("split"):
+        train_idx, test_idx = split_indices(len(player_df))
+        y = player_df[TARGETS].to_numpy(dtype=np.float32)
+        y_train, y_test = y[train_idx], y[test_idx]
+        X_test = player_df.iloc[test_idx].to_numpy(dtype=np.float32)
+        X_train = player_df.iloc[train_idx]
+        del player_df, y
+
+    cache_dir = None
+    if args.external_memory:
+        os.makedirs(args.external_memory, exist_ok=True)
+        cache_dir = tempfile.mkdtemp(prefix=f"{args.format}_", dir=args.external_memory)
+
+    try:
+        with prof.stage("build-matrix"):
+            dtrain = build_train_matrix(X_train, cache_dir, args.chunk_rows)
+            if not args.no_save:
+                save_profile(X_train, profile_path(model_file_for(args.format, args.output)))
+            del X_train
+
+        with prof.stage("train"):
+            model = train_shared(dtrain, y_train, multi_output=args.multi_output)
+            del dtrain
+        print("XGBoost all-rounder model trained successfully!")
+
+        with prof.stage("evaluate"):
+            metrics_df = metrics_table(y_test, model.predict(X_test))
+        print("\n================ Model Performance Metrics Table ================\n")
+        print(metrics_df.to_string(index=False))
+
+        if not args.no_save:
+            with prof.stage("save"):
+                model_file = model_file_for(args.format, args.output)
+                meta = {
+                    "format": args.format,
+                    "mode": "full",
+                    "rows": int(len(hashes)),
+                    "model_kind": type(model).__name__,
+                    "n_trees": tree_counts(model),
+                    "holdout_metrics": metrics_df.to_dict("records"),
+                }
+                if cv_mean is not None:
+                    meta["cv_folds"] = args.cv
+                    meta["cv_metrics_mean"] = cv_mean.to_dict("records")
+                    meta["cv_metrics_std"] = cv_std.to_dict("records")
+                save_model(model, model_file, meta, hashes[train_idx], hashes[test_idx])
+            print(f"All-rounder model saved at: {model_file}")
+    finally:
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+# ---------- Incremental Refresh ----------
+
+def _mae_ratios(metrics_df, baseline):
+    """Per-target MAE relative to the baseline held-out MAE."""
+    base = {m["Target"]: m["MAE"] for m in baseline}
+    return {row["Target"]: row["MAE"] / max(base[row["Target"]], 1e-9)
+            for row in metrics_df.to_dict("records")}
+
+def refresh(args, prof):
+    """Continue boosting the saved model on rows not seen at its last build.
+
+    Returns False when a full rebuild is needed instead (no usable previous model,
+    drift beyond --max-drift, or the refreshed model fails the quality check).
+    """
+    model_file = model_file_for(args.format, args.output)
+    saved = load_model_meta(model_file)
+    if saved is None:
+        print(f"[REFRESH] No model/metadata at {model_file}; full rebuild required.")
+        return False
+    prev_model, meta, seen, holdout = saved
+    prev_model = as_booster_ensemble(prev_model)
+    baseline = meta["holdout_metrics"]
+
+    with prof.stage("load+delta"):
+        player_df = load_player_df(args.format, args.data_path, impute=False)
+        hashes = row_hashes(player_df)
+        is_held_out = np.isin(hashes, holdout)
+        is_new = ~(np.isin(hashes, seen) | is_held_out)
+        impute_median(player_df, FEATURES)
+        delta_df = player_df[is_new]
+        delta_hashes = hashes[is_new]
+        X_old = player_df[is_held_out].to_numpy(dtype=np.float32)
+        y_old = player_df[is_held_out][TARGETS].to_numpy(dtype=np.float32)
+        del player_df
+    print(f"[REFRESH] {len(delta_df)} new rows since last build.")
+    if len(delta_df) < args.min_delta_rows:
+        print(f"[REFRESH] Fewer than {args.min_delta_rows} new rows; model left unchanged.")
+        return True
+
+    with prof.stage("drift-check"):
+        train_idx, test_idx = split_indices(len(delta_df))
+        X = delta_df.to_numpy(dtype=np.float32)
+        y = delta_df[TARGETS].to_numpy(dtype=np.float32)
+        prev_df = metrics_table(y[test_idx], prev_model.predict(X[test_idx]))
+        drift = _mae_ratios(prev_df, baseline)
+    print("[REFRESH] Previous model MAE on new rows / held-out MAE:",
+          {t: round(r, 3) for t, r in drift.items()})
+    if max(drift.values()) > args.max_drift:
+        print(f"[REFRESH] Drift above {args.max_drift}x; falling back to full rebuild.")
+        return False
+
+    with prof.stage("continue-boosting"):
+        dtrain = xgb.QuantileDMatrix(X[train_idx], feature_names=FEATURES)
+        model = train_shared(dtrain, y[train_idx], REFRESH_PARAMS, args.refresh_rounds,
+                             multi_output=isinstance(prev_model, MultiOutputBooster),
+                             init_model=prev_model)
+
+    with prof.stage("evaluate"):
+        metrics_df = metrics_table(y[test_idx], model.predict(X[test_idx]))
+        old_df = prev_old_df = None
+        if len(X_old):
+            old_df = metrics_table(y_old, model.predict(X_old))
+            prev_old_df = metrics_table(y_old, prev_model.predict(X_old))
+    print("\n================ Refreshed Model Metrics (new rows held out) ================\n")
+    print(metrics_df.to_string(index=False))
+    if old_df is None:
+        print("[REFRESH] None of the original held-out rows remain unchanged; forgetting check skipped.")
+    else:
+        print(f"\n======== Refreshed Model Metrics (original held-out rows, n={len(X_old)}) ========\n")
+        print(old_df.to_string(index=False))
+
+    # The refresh must not clearly lose to the previous model on the new rows or on the
+    # original held-out rows (10% slack for noise; the latter catches forgetting), and must
+    # stay within --max-drift of the last full build's held-out error.
+    worse = [t for t, new, old in zip(TARGETS, metrics_df["MAE"], prev_df["MAE"]) if new > 1.1 * old]
+    if old_df is not None:
+        worse += [f"{t} (original held-out)" for t, new, old
+                  in zip(TARGETS, old_df["MAE"], prev_old_df["MAE"]) if new > 1.1 * old]
+    ratios = _mae_ratios(metrics_df, baseline)
+    if worse or max(ratios.values()) > args.max_drift:
+        print(f"[REFRESH] Quality check failed (worse on {worse or 'held-out MAE'}); "
+              f"falling back to full rebuild.")
+        return False
+
+    if not args.no_save:
+        with prof.stage("save"):
+            meta = dict(meta, mode="refresh",
+                        rows=int(len(hashes)),
+                        refresh_count=meta.get("refresh_count", 0) + 1,
+                        n_trees=tree_counts(model),
+                        refresh_metrics=metrics_df.to_dict("records"),
+                        refresh_original_holdout_metrics=None if old_df is None
+                        else old_df.to_dict("records"))
+            # The new rows' test split joins the held-out set, so later refreshes never train on it
+            save_model(model, model_file, meta,
+                       np.concatenate([seen, delta_hashes[train_idx]]),
+                       np.concatenate([holdout, delta_hashes[test_idx]]))
+        print(f"Refreshed model saved at: {model_file}")
+    return True
+
+# ---------- Main Runner ----------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory-lean all-rounder model training.")
+    parser.add_argument("--format", choices=FORMATS, default="odi")
+    parser.add_argument("--data-path", default=DATA_PATH)
+    parser.add_argument("--output", help="model file (default models/<format>_allround_xgb_model.pkl)")
+    parser.add_argument("--external-memory", metavar="DIR",
+                        help="build the training matrix from Parquet chunks in DIR (external-memory pages on disk)")
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--multi-output", action="store_true",
+                        help="train one multi-target booster (vector leaves) instead of one per target")
+    parser.add_argument("--refresh", action="store_true",
+                        help="add trees for rows not seen at the last build instead of retraining")
+    parser.add_argument("--refresh-rounds", type=int, default=20,
+                        help="new trees per target added by --refresh")
+    parser.add_argument("--max-drift", type=float, default=1.5,
+                        help="rebuild from scratch when new-row MAE exceeds this multiple of held-out MAE")
+    parser.add_argument("--min-delta-rows", type=int, default=10)
+    parser.add_argument("--cv", type=int, metavar="K",
+                        help="run K-fold cross-validation (folds in parallel) before the build")
+    parser.add_argument("--cv-jobs", type=int, help="parallel CV folds (default: one per CPU, up to K)")
+    parser.add_argument("--cv-only", action="store_true", help="stop after cross-validation")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--profile-json", help="also write the stage profile to this JSON file")
+    args = parser.parse_args(argv)
+
+    prof = StageProfiler()
+    if not (args.refresh and refresh(args, prof)):
+        full_build(args, prof)
+
+    prof.report()
+    if args.profile_json:
+        prof.to_json(args.profile_json, format=args.format)
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,11 @@ const fetch = require('node-fetch');
 
 const MIN_MATCHES = { ODI: 10, T20: 15, Test: 10 };
 
+// Total time we give the Python service; the remaining budget is sent along as a
+// deadline so the Flask app sheds the request instead of answering after we gave up.
+const PY_TIMEOUT_MS = Number(process.env.PY_TIMEOUT_MS) || 3000;
+const DEADLINE_MARGIN_MS = 50;
+
 exports.predictForPlayer = async (req, res) => {
     try {
         const { playerId, format } = req.params;
@@ -31,7 +36,7 @@ exports.predictForPlayer = async (req, res) => {
             bat_not_out: stats.notOut,
             bat_runs: stats.runs,
             bat_high_score: stats.highScore,
-            bat_ballFaced: stats.ballsFaced,
+            bat_ballsFaced: stats.ballsFaced,
             bat_strike_rate: stats.strikeRate,
             bat_100s: stats.hundreds || 0,
             bat_50: stats.fifties || 0,
@@ -64,12 +69,35 @@ exports.predictForPlayer = async (req, res) => {
         else if (format === 'T20') PY_URL = PY_URL_T20;
         else return res.status(400).json({ message: 'Invalid format' });
 
-        // Call Python prediction service
-        const r = await fetch(PY_URL, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(payload)
-        });
+        // Call Python prediction service (aborted once the budget is spent)
+        const controller = new AbortController();
+        const timer = setTimeout(() => controller.abort(), PY_TIMEOUT_MS);
+        let r;
+        try {
+            r = await fetch(PY_URL, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-Request-Deadline-Ms': String(PY_TIMEOUT_MS - DEADLINE_MARGIN_MS)
+                },
+                body: JSON.stringify(payload),
+                signal: controller.signal
+            });
+        } catch (err) {
+            if (err.name === 'AbortError') {
+                return res.status(504).json({ message: 'Prediction service timed out' });
+            }
+            throw err;
+        } finally {
+            clearTimeout(timer);
+        }
+
+        // Load shed by the prediction service: pass the 503 and its Retry-After through
+        if (r.status === 503) {
+            const retryAfter = r.headers.get('retry-after') || '1';
+            res.set('Retry-After', retryAfter);
+            return res.status(503).json({ message: 'Prediction service busy, please retry', retryAfter: Number(retryAfter) });
+        }
 
         if (!r.ok) {
             return res.status(500).json({ message: 'Prediction service error', error: await r.text() });
@@ -96,6 +124,55 @@ exports.predictForPlayer = async (req, res) => {
 };
 
 
+// Streams an NDJSON (or CSV) upload through to the format's /predict_stream
+// endpoint and pipes the NDJSON predictions back, without buffering either body.
+const PY_STREAM_URLS = {
+    ODI: process.env.PY_STREAM_ODI || 'http://127.0.0.1:5000/predict_stream',
+    Test: process.env.PY_STREAM_TEST || 'http://127.0.0.1:5001/predict_stream_test',
+    T20: process.env.PY_STREAM_T20 || 'http://127.0.0.1:5002/predict_stream_t20',
+};
+
+exports.streamPredictions = async (req, res) => {
+    try {
+        const PY_URL = PY_STREAM_URLS[req.params.format];
+        if (!PY_URL) return res.status(400).json({ message: 'Invalid format' });
+
+        // Stop the upstream call if our client goes away mid-stream
+        const controller = new AbortController();
+        res.on('close', () => { if (!res.writableFinished) controller.abort(); });
+
+        const r = await fetch(PY_URL, {
+            method: 'POST',
+            headers: {
+                'Content-Type': req.headers['content-type'] || 'application/x-ndjson',
+                'X-Request-Deadline-Ms': String(PY_TIMEOUT_MS - DEADLINE_MARGIN_MS)
+            },
+            body: req,
+            signal: controller.signal
+        });
+
+        if (r.status === 503) {
+            const retryAfter = r.headers.get('retry-after') || '1';
+            res.set('Retry-After', retryAfter);
+            return res.status(503).json({ message: 'Prediction service busy, please retry', retryAfter: Number(retryAfter) });
+        }
+        if (!r.ok) {
+            return res.status(500).json({ message: 'Prediction service error', error: await r.text() });
+        }
+
+        res.status(200).set('Content-Type', 'application/x-ndjson');
+        r.body.on('error', (err) => res.destroy(err));
+        r.body.pipe(res);
+    } catch (err) {
+        if (err.name === 'AbortError') return;
+        console.error(err);
+        if (!res.headersSent) {
+            return res.status(500).json({ message: 'Error streaming predictions', error: err.message });
+        }
+        res.destroy(err);
+    }
+};
+
 // New controller for fetching all predictions
 exports.getPredictionsHistory = async (req, res) => {
     try {
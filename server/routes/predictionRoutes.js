@@ -6,5 +6,8 @@ const authMiddleware = require('../middleware/authMiddleware');
 
 router.get('/:playerId/:format', authMiddleware, predictionController.predictForPlayer);
 
+// NDJSON/CSV bulk scoring, streamed both ways
+router.post('/stream/:format', authMiddleware, predictionController.streamPredictions);
+
 router.get('/history/:playerId/:format', authMiddleware, predictionController.getPredictionsHistory);
 module.exports = router;
\ No newline at end of file